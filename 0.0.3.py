@@ -3,9 +3,15 @@ import os
 import time
 import threading
 import queue
+import pickle
+import multiprocessing
+import struct
 import psutil
-from datetime import datetime
+from array import array
 from collections import deque
+from functools import lru_cache
+from types import MappingProxyType
+from concurrent.futures import ProcessPoolExecutor
 
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
                              QGridLayout, QGroupBox, QLabel, QPushButton, QComboBox, 
@@ -17,21 +23,406 @@ from PyQt6.QtGui import (QColor, QCloseEvent)
 
 import mido
 from mido import MidiFile, Message
+from mido.midifiles.meta import build_meta_message
+
+
+class MidiEventRing:
+    """MIDI事件环形缓冲区 - 单生产者/单消费者，预分配槽位，读写不加锁"""
+    
+    def __init__(self, capacity=65536):
+        # 容量取2的幂，下标用位与代替取模
+        size = 1
+        while size < capacity:
+            size <<= 1
+        self.capacity = size
+        self.mask = size - 1
+        self.times = array('d', bytes(8 * size))  # 事件时间槽
+        self.msgs = [None] * size  # 事件消息槽
+        self.head = 0  # 已消费事件计数，只由消费者推进
+        self.tail = 0  # 已生产事件计数，只由生产者推进
+        self.discard_until = 0  # 清空请求：此计数之前的事件作废，由消费者在取事件前跳过并释放槽位
+        self.data_ready = threading.Event()  # 仅用于空队列时唤醒消费者
+    
+    def __len__(self):
+        """未消费事件数（生产计数 - 消费计数，已请求清空的事件不计）"""
+        # 先读消费计数再读生产计数，两者都只增不减，差值不会为负
+        consumed = max(self.head, self.discard_until)
+        return self.tail - consumed
+    
+    def empty(self):
+        """是否为空"""
+        consumed = max(self.head, self.discard_until)
+        return consumed >= self.tail
+    
+    def push(self, event_time, msg):
+        """写入事件，缓冲区已满时返回False"""
+        tail = self.tail
+        if tail - self.head >= self.capacity:
+            return False
+        index = tail & self.mask
+        self.times[index] = event_time
+        self.msgs[index] = msg
+        # 先写槽位再发布下标（GIL下int赋值是原子的）
+        self.tail = tail + 1
+        if not self.data_ready.is_set():
+            self.data_ready.set()
+        return True
+    
+    def discard_cleared(self):
+        """（消费者调用）执行清空请求：跳过作废事件并释放其槽位"""
+        head, target = self.head, self.discard_until
+        if target > head:
+            msgs, mask = self.msgs, self.mask
+            for i in range(head, target):
+                msgs[i & mask] = None
+            self.head = target
+    
+    def peek_time(self):
+        """查看队首事件时间（调用前需确认非空）"""
+        self.discard_cleared()
+        return self.times[self.head & self.mask]
+    
+    def pop(self):
+        """弹出队首事件消息（调用前需确认非空）"""
+        self.discard_cleared()
+        index = self.head & self.mask
+        msg = self.msgs[index]
+        self.msgs[index] = None
+        self.head += 1
+        return msg
+    
+    def pop_due(self, deadline, limit, burst=0.001):
+        """弹出已到期事件（最多limit个），与最后一个事件相差不足burst秒的同刻事件一并弹出"""
+        self.discard_cleared()
+        head, tail = self.head, self.tail
+        times, msgs, mask = self.times, self.msgs, self.mask
+        due = []
+        append = due.append
+        end = min(tail, head + limit)
+        event_time = 0.0
+        while head < end:
+            index = head & mask
+            event_time = times[index]
+            if event_time > deadline:
+                break
+            append(msgs[index])
+            msgs[index] = None
+            head += 1
+        else:
+            # 达到limit：同一时刻的后续事件不再逐批等待，直接随本批发出
+            if due:
+                burst_end = event_time + burst
+                while head < tail:
+                    index = head & mask
+                    if times[index] >= burst_end or times[index] > deadline:
+                        break
+                    append(msgs[index])
+                    msgs[index] = None
+                    head += 1
+        self.head = head
+        return due
+    
+    def wait(self, timeout):
+        """队列为空时等待生产者写入"""
+        self.data_ready.clear()
+        if self.empty():
+            self.data_ready.wait(timeout)
+    
+    def clear(self):
+        """请求丢弃所有已写入的事件（任意线程可调用）；head仍只由消费者推进，槽位由消费者释放"""
+        self.discard_until = self.tail
+
+
+# 音符查找表（按MIDI音符号索引）
+NOTE_NAMES = ('C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B')
+NOTE_NAME = tuple(NOTE_NAMES[n % 12] for n in range(128))
+NOTE_OCTAVE = tuple(n // 12 - 1 for n in range(128))
+NOTE_FREQUENCY = tuple(round(440.0 * (2.0 ** ((n - 69) / 12.0)), 2) for n in range(128))
+NOTE_INFO = tuple({'name': NOTE_NAME[n], 'octave': NOTE_OCTAVE[n], 'frequency': NOTE_FREQUENCY[n]}
+                  for n in range(128))
+
+# 各大调音阶的12位音级掩码（第n位表示音级n属于该音阶）
+MAJOR_SCALE_MASKS = {
+    'C': 0b101010110101,
+    'G': 0b011010110101,
+    'D': 0b011011010101,
+    'A': 0b101011010101,
+    'E': 0b101011010011,
+    'B': 0b100111010011,
+    'F#': 0b100111001011,
+    'Gb': 0b100111001011,
+    'Db': 0b100110101011,
+    'Ab': 0b010110101011,
+    'Eb': 0b011010101101,
+    'Bb': 0b101010101101,
+    'F': 0b100110110101
+}
+# 按音级(0-11)索引：音级所在的大调 -> 级数（掩码中低于该位的置位数 + 1）
+# 各调用方共享同一份映射，用只读视图防止被意外修改
+MAJOR_SCALE_DEGREES = tuple(
+    MappingProxyType({key: bin(mask & ((1 << n) - 1)).count('1') + 1
+                      for key, mask in MAJOR_SCALE_MASKS.items() if mask >> n & 1})
+    for n in range(12))
+
+# 调号的中文名称
+KEY_NAMES = {
+    'C': 'C大调', 'a': 'a小调',
+    'G': 'G大调', 'e': 'e小调',
+    'D': 'D大调', 'b': 'b小调',
+    'A': 'A大调', 'f#': '升f小调',
+    'E': 'E大调', 'c#': '升c小调',
+    'B': 'B大调', 'g#': '升g小调',
+    'F#': '升F大调', 'd#': '升d小调',
+    'Gb': '降G大调', 'bb': '降b小调',
+    'Db': '降D大调', 'ab': '降a小调',
+    'Ab': '降A大调', 'f': 'f小调',
+    'Eb': '降E大调', 'c': 'c小调',
+    'Bb': '降B大调', 'g': 'g小调',
+    'F': 'F大调', 'd': 'd小调'
+}
+
+# 调号根音相对C的半音数，以及音阶级数名称
+KEY_OFFSETS = {
+    'C': 0, 'G': 7, 'D': 2, 'A': 9, 'E': 4, 'B': 11,
+    'F#': 6, 'Gb': 6, 'Db': 1, 'Ab': 8, 'Eb': 3, 'Bb': 10, 'F': 5
+}
+DEGREE_NAMES = ("主音", "上主音", "中音", "下属音", "属音", "下中音", "导音")
+INTERVAL_NAMES = ("纯一度", "小二度", "大二度", "小三度", "大三度",
+                  "纯四度", "增四度/减五度", "纯五度", "小六度",
+                  "大六度", "小七度", "大七度")
+MAJOR_INTERVALS = (0, 2, 4, 5, 7, 9, 11)
+MINOR_INTERVALS = (0, 2, 3, 5, 7, 8, 10)  # 自然小调
+
+
+def build_scale_notes(key):
+    """按调号首字母构建音阶音名（首字母大写为大调，小写为小调）"""
+    root_note = KEY_OFFSETS.get(key[0].upper(), 0)
+    intervals = MAJOR_INTERVALS if key[0].isupper() else MINOR_INTERVALS
+    return tuple(NOTE_NAMES[(root_note + i) % 12] for i in intervals)
+
+
+# 音阶只取决于调号首字母，导入时为7个音名的大小写预先构建
+SCALE_NOTES = {first: build_scale_notes(first) for first in 'CDEFGABcdefgab'}
+
+# 单音分析中"在大调中的位置"段落，只取决于音级，按音级(0-11)预先生成（只显示几个常见大调）
+COMMON_MAJOR_KEYS = ('C', 'G', 'D', 'F', 'Bb', 'A', 'Eb')
+MAJOR_POSITION_TEXT = tuple(
+    "在大调中的位置:\n" + "".join(
+        f"   {key}大调: 第{degrees[key]}级 ({DEGREE_NAMES[degrees[key] - 1]})\n"
+        for key in COMMON_MAJOR_KEYS if key in degrees)
+    for degrees in MAJOR_SCALE_DEGREES)
+
+# 一小时内每一秒的MM:SS文本，进度显示直接按整秒查表
+TIME_TEXT = tuple(f"{minutes:02d}:{seconds:02d}" for minutes in range(60) for seconds in range(60))
+
+# 常见和弦类型的音程模式（相对根音的半音数，和弦符号，描述）
+CHORD_PATTERNS = {
+    '大三和弦': ((0, 4, 7), 'Maj', '大三和弦'),
+    '小三和弦': ((0, 3, 7), 'm', '小三和弦'),
+    '增三和弦': ((0, 4, 8), 'aug', '增三和弦'),
+    '减三和弦': ((0, 3, 6), 'dim', '减三和弦'),
+    '七和弦': ((0, 4, 7, 10), '7', '属七和弦'),
+    '大七和弦': ((0, 4, 7, 11), 'Maj7', '大七和弦'),
+    '小七和弦': ((0, 3, 7, 10), 'm7', '小七和弦'),
+    '减七和弦': ((0, 3, 6, 9), 'dim7', '减七和弦'),
+    '半减七和弦': ((0, 3, 6, 10), 'm7b5', '半减七和弦'),
+    '六和弦': ((0, 4, 7, 9), '6', '六和弦'),
+    '九和弦': ((0, 4, 7, 10, 2), '9', '九和弦')
+}
+# 和弦模式的12位音程掩码，按CHORD_PATTERNS顺序：(掩码, 音程模式, 和弦符号, 描述)
+CHORD_PATTERN_MASKS = tuple((sum(1 << i for i in pattern), pattern, symbol, desc)
+                            for pattern, symbol, desc in CHORD_PATTERNS.values())
+
+# 大调中的和弦级数
+MAJOR_KEY_CHORDS = {
+    'C': ('C', 'Dm', 'Em', 'F', 'G', 'Am', 'Bdim'),
+    'G': ('G', 'Am', 'Bm', 'C', 'D', 'Em', 'F#dim'),
+    'D': ('D', 'Em', 'F#m', 'G', 'A', 'Bm', 'C#dim'),
+    'A': ('A', 'Bm', 'C#m', 'D', 'E', 'F#m', 'G#dim'),
+    'E': ('E', 'F#m', 'G#m', 'A', 'B', 'C#m', 'D#dim'),
+    'B': ('B', 'C#m', 'D#m', 'E', 'F#', 'G#m', 'A#dim'),
+    'F#': ('F#', 'G#m', 'A#m', 'B', 'C#', 'D#m', 'Edim'),
+    'Gb': ('Gb', 'Abm', 'Bbm', 'Cb', 'Db', 'Ebm', 'Fdim'),
+    'Db': ('Db', 'Ebm', 'Fm', 'Gb', 'Ab', 'Bbm', 'Cdim'),
+    'Ab': ('Ab', 'Bbm', 'Cm', 'Db', 'Eb', 'Fm', 'Gdim'),
+    'Eb': ('Eb', 'Fm', 'Gm', 'Ab', 'Bb', 'Cm', 'Ddim'),
+    'Bb': ('Bb', 'Cm', 'Dm', 'Eb', 'F', 'Gm', 'Adim'),
+    'F': ('F', 'Gm', 'Am', 'Bb', 'C', 'Dm', 'Edim')
+}
+CHORD_DEGREE_NAMES = ("主和弦", "上主和弦", "中音和弦", "下属和弦",
+                      "属和弦", "下中音和弦", "导音和弦")
+
+
+@lru_cache(maxsize=4096)
+def identify_chord_classes(note_classes):
+    """按升序音级元组识别和弦类型，返回(和弦名, 描述, 构成音元组)（结果缓存）"""
+    # 相对根音的半音数合成12位掩码
+    root = note_classes[0]
+    relative_mask = 0
+    for n in note_classes:
+        relative_mask |= 1 << ((n - root) % 12)
+    
+    # 模式掩码的所有位都在音符掩码中即匹配
+    for mask, pattern, symbol, desc in CHORD_PATTERN_MASKS:
+        if relative_mask & mask == mask:
+            chord_notes = tuple(NOTE_NAMES[(root + i) % 12] for i in pattern)
+            return f"{NOTE_NAMES[root]}{symbol}", desc, chord_notes
+    
+    # 如果没有匹配到已知和弦，返回基本信息
+    chord_notes = tuple(NOTE_NAMES[n] for n in note_classes)
+    return f"{NOTE_NAMES[root]}和弦", f"由{len(note_classes)}个音符组成", chord_notes
+
+
+@lru_cache(maxsize=1024)
+def chord_degree_in_key(chord_name, key):
+    """和弦在调式中的级数文本（结果缓存）"""
+    # 提取和弦根音
+    root = chord_name[0]
+    if len(chord_name) > 1 and chord_name[1] in ('#', 'b'):
+        root += chord_name[1]
+    
+    chords = MAJOR_KEY_CHORDS.get(key[0].upper())
+    if chords:
+        for i, chord in enumerate(chords):
+            if chord.startswith(root):
+                return f"{i+1}级 {CHORD_DEGREE_NAMES[i]}"
+    
+    return "未知级数"
+
+# 预构建的原始关闭消息：各通道All Notes Off (CC 123)，以及按音符号索引的note_off
+ALL_NOTES_OFF_MESSAGES = tuple(bytes((0xB0 | channel, 123, 0)) for channel in range(16))
+NOTE_OFF_MESSAGES = tuple(bytes((0x80, note, 0)) for note in range(128))
+
+# 性能数据字段（与update_performance_data中数值元组的顺序一致）
+PERFORMANCE_FIELDS = ('message_count', 'session_message_count', 'throughput', 'latency',
+                      'active_notes', 'queue_size', 'active_ports')
+
+# 日志级别对应的过滤位
+LOG_LEVEL_BITS = {'debug': 1, 'info': 2, 'warning': 4, 'error': 8}
+
+# mido解析路径保留的消息类型
+PARSE_CHANNEL_TYPES = frozenset(('note_on', 'note_off', 'control_change', 'program_change', 'pitchwheel'))
+PARSE_META_TYPES = frozenset(('set_tempo', 'time_signature', 'key_signature'))
+
+# 快速解析保留的通道消息类型（note_off/note_on/control_change/program_change/pitchwheel）
+FAST_PARSE_STATUS = frozenset((0x80, 0x90, 0xB0, 0xC0, 0xE0))
+# 快速解析保留的元消息类型
+FAST_PARSE_META = {0x51: 'set_tempo', 0x58: 'time_signature', 0x59: 'key_signature'}
+
+
+def decode_midi_events(data, filter_zero_velocity=False):
+    """直接解码MIDI文件字节，返回按时间排序的(秒, 事件)列表，通道消息为原始字节，元消息为MetaMessage"""
+    if data[:4] != b'MThd':
+        return None
+    header_size, _, num_tracks, division = struct.unpack('>IHHH', data[4:14])
+    if division & 0x8000:
+        # SMPTE时间格式交给mido处理
+        return None
+
+    tick_events = []
+    pos = 8 + header_size
+    data_len = len(data)
+    for _ in range(num_tracks):
+        if pos + 8 > data_len:
+            break
+        chunk_type = data[pos:pos + 4]
+        chunk_size = struct.unpack('>I', data[pos + 4:pos + 8])[0]
+        i = pos + 8
+        end = min(i + chunk_size, data_len)
+        pos = i + chunk_size
+        if chunk_type != b'MTrk':
+            continue
+
+        tick = 0
+        running_status = 0
+        while i < end:
+            # 可变长度delta时间
+            b = data[i]
+            i += 1
+            delta = b & 0x7F
+            while b & 0x80:
+                b = data[i]
+                i += 1
+                delta = (delta << 7) | (b & 0x7F)
+            tick += delta
+
+            status = data[i]
+            if status & 0x80:
+                i += 1
+            else:
+                # 运行状态：沿用上一个通道状态字节
+                status = running_status
+
+            if status == 0xFF:
+                meta_type = data[i]
+                i += 1
+                b = data[i]
+                i += 1
+                length = b & 0x7F
+                while b & 0x80:
+                    b = data[i]
+                    i += 1
+                    length = (length << 7) | (b & 0x7F)
+                if meta_type == 0x2F:
+                    break
+                if meta_type in FAST_PARSE_META:
+                    tick_events.append((tick, build_meta_message(meta_type, list(data[i:i + length]))))
+                i += length
+            elif status == 0xF0 or status == 0xF7:
+                b = data[i]
+                i += 1
+                length = b & 0x7F
+                while b & 0x80:
+                    b = data[i]
+                    i += 1
+                    length = (length << 7) | (b & 0x7F)
+                i += length
+            elif status >= 0x80:
+                if status < 0xF0:
+                    running_status = status
+                kind = status & 0xF0
+                size = 1 if kind == 0xC0 or kind == 0xD0 else 2
+                if kind in FAST_PARSE_STATUS and not (
+                        filter_zero_velocity and kind == 0x90 and data[i + 1] == 0):
+                    tick_events.append((tick, bytes((status,)) + data[i:i + size]))
+                i += size
+            else:
+                # 没有运行状态的数据字节，文件已损坏
+                raise ValueError(f"无效的状态字节: {status}")
+
+    # 多音轨按tick稳定排序合并，再按速度变化换算为秒
+    tick_events.sort(key=lambda event: event[0])
+    events = []
+    tempo_scale = 500000 / (division * 1000000.0)
+    last_tick = 0
+    current_time = 0.0
+    for tick, event in tick_events:
+        current_time += (tick - last_tick) * tempo_scale
+        last_tick = tick
+        events.append((current_time, event))
+        if event.__class__ is not bytes and event.type == 'set_tempo':
+            tempo_scale = event.tempo / (division * 1000000.0)
+    return events
+
+
+def decode_midi_file(file_path, filter_zero_velocity=False):
+    """读取并解码MIDI文件，供解析进程池调用"""
+    with open(file_path, 'rb') as f:
+        return decode_midi_events(f.read(), filter_zero_velocity)
+
 
 class MidiPlayerApp(QMainWindow):
     """Trusler's MIDI Player - v0.0.3(GUI Mode)"""
     
     # 信号定义
-    update_status = pyqtSignal(str, str)  # 状态更新信号 (状态文本, 颜色)
-    update_progress = pyqtSignal(int, int, str)  # 进度更新信号 (当前, 总时长, 时间文本)
-    update_active_notes = pyqtSignal(list)  # 活跃音符更新信号
-    update_performance = pyqtSignal(dict)  # 性能数据更新信号
-    update_note_history = pyqtSignal(list)  # 音符历史更新信号
-    update_log = pyqtSignal(str, str)  # 日志更新信号 (消息, 级别)
+    update_status = pyqtSignal(str, str)  # 状态更新信号 (状态文本, 状态样式)
+    update_frame = pyqtSignal(dict)  # 界面帧更新信号 (进度、活跃音符、乐理、性能数据、FPS合并发送)
+    update_active_notes = pyqtSignal(list)  # 活跃音符更新信号（仅用于清空等单次事件）
+    append_note_history = pyqtSignal(list)  # 新增音符历史记录信号（仅增量）
     update_port_status = pyqtSignal(int, bool)  # 端口状态更新信号 (端口号, 连接状态)
     update_file_list = pyqtSignal(list)  # 文件列表更新信号
-    update_fps = pyqtSignal(int)  # FPS更新信号
     update_music_theory = pyqtSignal(str)  # 乐理知识更新信号
+    update_music_info = pyqtSignal()  # 音乐信息（速度/拍号/调号）更新信号
     
     def __init__(self):
         super().__init__()
@@ -54,27 +445,64 @@ class MidiPlayerApp(QMainWindow):
     def init_config(self):
         """初始化配置"""
         self.current_file_index = -1
-        self.playlist = []
+        self.playlist = []  # (完整路径, 文件名)：文件名在添加时计算一次
+        self.playlist_by_name = {}  # 文件名 -> 播放列表中的完整路径
         self.is_playing = False
         self.is_paused = False
         self.playback_complete = False  # 播放完成标志
         self.current_time = 0
         self.total_time = 0
-        self.active_notes = {}  # {note: {'name': '', 'octave': 0, 'frequency': 0, 'velocity': 0, 'start_time': 0}}
+        # 活跃音符：按MIDI音符号(0-127)索引的定长数组（结构数组布局）
+        self.note_active = bytearray(128)  # 1表示该音符正在发声
+        self.note_velocity = bytearray(128)  # 力度
+        self.note_start = array('q', bytes(8 * 128))  # 开始时间（perf_counter_ns）
         self.note_history = deque(maxlen=50)
-        self.message_count = 0  # 记录当前歌曲发送的MIDI消息总数
-        self.session_message_count = 0  # 记录会话总消息数
-        self.start_time = None
-        self.queue_lengths = []
+        self.clock_cache_sec = -1  # 历史记录时间文本缓存（按秒）
+        self.clock_cache_text = ''
+        # 音符历史新增记录，等待实时显示定时器统一取走
+        self.history_pending = deque(maxlen=50)
+        # 工作线程写入的最新活跃音符快照，由界面帧定时器取走（None表示无新数据）
+        self.active_notes_frame = None
+        self.theory_frame = None  # 待显示的乐理文本
+        self.last_theory_text = None
+        self.pending_fps = None
+        # 消息计数：每个MIDI工作线程只写自己的槽位，读取时求和，无需加锁
+        self.worker_message_counts = []
+        self.retired_message_count = 0  # 已重启线程累计的消息数
+        self.message_count_base = 0  # 当前歌曲开始时的会话消息数
+        self.start_time = None  # 播放开始时刻（perf_counter_ns）
+        self.play_generation = 0  # 每次加载文件递增，用于丢弃过期的解析结果
+        self.parse_pool = None  # 黑乐谱文件在独立进程中解码，避免与发送线程争抢GIL（首次使用时创建，线程重启时保留）
+        # 发送延迟累计值：每个工作线程独占一个槽位（总和/采样数/峰值），均值在界面线程按需计算
+        self.latency_sums = []
+        self.latency_counts = []
+        self.latency_peaks = []
+        # 性能数据：只比较数值元组，有变化时原地更新同一个字典再随帧发送（槽函数在界面线程同步读取）
+        self.last_performance_values = None
+        self.performance_payload = dict.fromkeys(PERFORMANCE_FIELDS, 0)
+        self.last_progress_frame = None
+        # 日志环形缓冲区，任意线程写入，由界面定时器批量取出显示
+        self.log_ring = deque(maxlen=2000)
+        # 各级别日志颜色，预先构建QColor供每次追加复用
+        self.log_colors = {level: QColor(code) for level, code in (
+            ('debug', '#888888'), ('info', '#61c0bf'), ('warning', '#ffc107'), ('error', '#dc3545'))}
+        self.default_log_color = QColor('#ffffff')
+        # 日志过滤掩码，勾选框变化时更新，记录日志时只做一次整数与运算
+        self.log_mask = 0b1111
+        self.ignore_non_fatal = False
         self.average_latency = 0
+        self.peak_latency = 0
         self.fps_counter = 0
-        self.fps_last_time = time.time()
+        self.fps_last_time = time.perf_counter_ns()
         self.current_tempo = 120  # 默认BPM
         self.current_time_signature = (4, 4)  # 默认拍号
         self.current_key = None  # 当前调号
+        self.key_name_source = None  # get_key_name缓存对应的调号
+        self.key_name_text = "未知"
         
         # 黑乐谱优化参数
         self.black_midi_mode = False
+        self.cpu_count = os.cpu_count() or 2
         self.num_midi_threads = 2
         self.batch_size = 10
         self.max_active_notes = 500
@@ -87,18 +515,24 @@ class MidiPlayerApp(QMainWindow):
         self.port2_connected = False
         self.port1_out = None
         self.port2_out = None
+        # 已连接端口的发送函数，连接状态变化时重建
+        self.port_senders = ()
         
         # 线程控制
         self.stop_event = threading.Event()
         self.pause_event = threading.Event()
         self.pause_event.set()  # 初始为非暂停状态
         
-        # 锁机制
-        self.counter_lock = threading.Lock()
-        
         # 实时显示属性
-        self.last_display_update = time.time()
+        self.last_display_update = time.perf_counter_ns()
         self.last_display_count = 0
+        # 缓存当前进程对象，cpu_percent(None)首次调用只做基准采样，之后非阻塞
+        self.process = psutil.Process()
+        self.process.cpu_percent(None)
+        # CPU/内存每秒采样一次（每10个显示周期），其余周期沿用上次结果
+        self.system_sample_tick = 0
+        self.cpu_usage = 0.0
+        self.memory_usage = self.process.memory_info().rss / (1024 * 1024)
         
     def init_ui(self):
         """初始化UI界面"""
@@ -167,6 +601,14 @@ class MidiPlayerApp(QMainWindow):
         # 连接信号
         self.connect_signals()
         
+    def set_status_style(self, label, status):
+        """切换状态标签的status属性，由全局样式表决定颜色"""
+        if label.property("status") == status:
+            return
+        label.setProperty("status", status)
+        label.style().unpolish(label)
+        label.style().polish(label)
+    
     def get_global_stylesheet(self):
         """获取全局样式表 - 使用暗色主题"""
         return """
@@ -207,6 +649,8 @@ class MidiPlayerApp(QMainWindow):
                 padding: 8px 16px;
                 font-weight: bold;
                 font-size: 11pt;
+                width: 90px;
+                height: 32px;
                 transition: all 150ms ease-in-out;
             }
             
@@ -216,11 +660,6 @@ class MidiPlayerApp(QMainWindow):
                 font-size: 12pt;
             }
             
-            QPushButton:not([isPlayControl="true"]) {
-                width: 90px;
-                height: 32px;
-            }
-            
             QPushButton:hover {
                 background-color: #fae3d9;
                 color: #1a1a1a;
@@ -295,6 +734,9 @@ class MidiPlayerApp(QMainWindow):
                 border-radius: 10px;
                 height: 20px;
                 margin: 0 8px;
+                color: #ffffff;
+                font-weight: bold;
+                text-align: center;
             }
             
             QProgressBar::chunk {
@@ -340,30 +782,25 @@ class MidiPlayerApp(QMainWindow):
                 font-weight: bold;
             }
             
-            /* 自定义样式 */
-            .status-connected {
+            /* 状态颜色（通过status动态属性切换） */
+            QLabel[status="ok"] {
                 color: #28a745;
-                font-weight: bold;
             }
             
-            .status-disconnected {
+            QLabel[status="error"] {
                 color: #dc3545;
-                font-weight: bold;
             }
             
-            .status-playing {
-                color: #28a745;
-                font-weight: bold;
+            QLabel[status="warning"] {
+                color: #ffc107;
             }
             
-            .status-paused {
-                color: #ffc107;
-                font-weight: bold;
+            QLabel[status="info"] {
+                color: #61c0bf;
             }
             
-            .status-stopped {
-                color: #dc3545;
-                font-weight: bold;
+            QLabel#playback_status {
+                font-size: 11pt;
             }
         """
     
@@ -396,7 +833,7 @@ class MidiPlayerApp(QMainWindow):
         self.port1_status = QLabel("未连接")
         self.port1_status.setProperty("isStatus", True)
         self.port1_status.setObjectName("port1_status")
-        self.port1_status.setStyleSheet("color: #dc3545; font-weight: bold;")
+        self.set_status_style(self.port1_status, "error")
         port_layout.addWidget(self.port1_status)
         
         # 端口2
@@ -411,7 +848,7 @@ class MidiPlayerApp(QMainWindow):
         self.port2_status = QLabel("未连接")
         self.port2_status.setProperty("isStatus", True)
         self.port2_status.setObjectName("port2_status")
-        self.port2_status.setStyleSheet("color: #dc3545; font-weight: bold;")
+        self.set_status_style(self.port2_status, "error")
         port_layout.addWidget(self.port2_status)
         
         # 测试连接按钮
@@ -424,7 +861,7 @@ class MidiPlayerApp(QMainWindow):
         # 全局状态提示
         self.global_status = QLabel("就绪")
         self.global_status.setProperty("isStatus", True)
-        self.global_status.setStyleSheet("color: #61c0bf; font-weight: bold;")
+        self.set_status_style(self.global_status, "info")
         status_layout.addWidget(self.global_status, alignment=Qt.AlignmentFlag.AlignRight)
         
         parent_layout.addWidget(status_widget)
@@ -539,19 +976,17 @@ class MidiPlayerApp(QMainWindow):
         
         layout.addLayout(black_midi_layout)
         
-        # 进度条和时间显示
+        # 进度条（时间文本直接显示在进度条上）
         progress_layout = QHBoxLayout()
         progress_layout.setSpacing(8)
         
         self.progress_bar = QProgressBar()
         self.progress_bar.setRange(0, 1000)
         self.progress_bar.setValue(0)
+        self.progress_bar.setTextVisible(True)
+        self.progress_bar.setFormat("00:00 / 00:00")
         progress_layout.addWidget(self.progress_bar, 1)
         
-        self.time_label = QLabel("00:00 / 00:00")
-        self.time_label.setStyleSheet("font-weight: bold; min-width: 120px; text-align: right;")
-        progress_layout.addWidget(self.time_label)
-        
         layout.addLayout(progress_layout)
         
         # 播放状态和性能信息
@@ -560,7 +995,8 @@ class MidiPlayerApp(QMainWindow):
         
         self.playback_status = QLabel("状态: 停止")
         self.playback_status.setProperty("isStatus", True)
-        self.playback_status.setStyleSheet("color: #dc3545; font-weight: bold; font-size: 11pt;")
+        self.playback_status.setObjectName("playback_status")
+        self.set_status_style(self.playback_status, "error")
         
         #self.performance_info = QLabel("吞吐量: *** ev/s | 延迟: 0 ms")
         self.performance_info = QLabel("")
@@ -585,6 +1021,21 @@ class MidiPlayerApp(QMainWindow):
         self.active_notes_table.setColumnCount(5)
         self.active_notes_table.setHorizontalHeaderLabels(["音符", "八度", "频率", "力度", "时长"])
         self.active_notes_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        
+        # 预分配128行（每个MIDI音符一行），刷新时只修改文字和行的显示状态
+        self.active_notes_table.setRowCount(128)
+        self.active_note_cells = []
+        self.active_note_texts = []
+        for row in range(128):
+            cells = []
+            for col in range(5):
+                item = QTableWidgetItem("")
+                self.active_notes_table.setItem(row, col, item)
+                cells.append(item)
+            self.active_note_cells.append(cells)
+            self.active_note_texts.append([""] * 5)
+            self.active_notes_table.setRowHidden(row, True)
+        self.visible_note_rows = set()
         layout.addWidget(self.active_notes_table)
         
         # 浮动窗口按钮
@@ -723,6 +1174,8 @@ class MidiPlayerApp(QMainWindow):
         self.log_text = QTextEdit()
         self.log_text.setReadOnly(True)
         self.log_text.setMaximumHeight(120)
+        # 限制文档行数，旧日志自动丢弃，避免长时间运行后追加和重绘越来越慢
+        self.log_text.document().setMaximumBlockCount(5000)
         self.log_text.setStyleSheet("""
             background-color: #1a1a1a;
             color: #ffffff;
@@ -739,15 +1192,18 @@ class MidiPlayerApp(QMainWindow):
     def connect_signals(self):
         """连接信号槽"""
         self.update_status.connect(self.on_status_updated)
-        self.update_progress.connect(self.on_progress_updated)
+        self.update_frame.connect(self.on_frame_updated)
         self.update_active_notes.connect(self.on_active_notes_updated)
-        self.update_performance.connect(self.on_performance_updated)
-        self.update_note_history.connect(self.on_note_history_updated)
-        self.update_log.connect(self.on_log_updated)
+        self.append_note_history.connect(self.on_note_history_appended)
         self.update_port_status.connect(self.on_port_status_updated)
         self.update_file_list.connect(self.on_file_list_updated)
-        self.update_fps.connect(self.on_fps_updated)
         self.update_music_theory.connect(self.on_music_theory_updated)
+        self.update_music_info.connect(self.update_music_info_display)
+        
+        # 日志过滤勾选框
+        for check in (self.debug_check, self.info_check, self.warning_check,
+                      self.error_check, self.ignore_non_fatal_check):
+            check.stateChanged.connect(self.update_log_filter)
     
     def init_midi_system(self):
         """初始化MIDI系统"""
@@ -759,24 +1215,27 @@ class MidiPlayerApp(QMainWindow):
             
             self.log("MIDI系统初始化成功", "info")
             self.global_status.setText("就绪")
-            self.global_status.setStyleSheet("color: #61c0bf; font-weight: bold;")
+            self.set_status_style(self.global_status, "info")
         except Exception as e:
             self.log(f"MIDI系统初始化失败: {str(e)}", "error")
             self.global_status.setText("MIDI系统错误")
-            self.global_status.setStyleSheet("color: #dc3545; font-weight: bold;")
+            self.set_status_style(self.global_status, "error")
     
     def init_threads(self):
         """初始化线程和队列"""
-        # 事件队列
-        self.midi_event_queue = queue.Queue(maxsize=100000)  # 增大队列容量
-        self.parse_queue = queue.Queue(maxsize=100)
-        
         # 根据模式选择线程数量
-        if self.black_midi_mode:
-            import multiprocessing
-            self.num_midi_threads = multiprocessing.cpu_count() * 2
-        else:
-            self.num_midi_threads = 2
+        self.num_midi_threads = self.cpu_count * 2 if self.black_midi_mode else 2
+        
+        # 事件队列：每个MIDI工作线程独占一个环形缓冲区（单生产者/单消费者）
+        self.midi_rings = [MidiEventRing(65536) for _ in range(self.num_midi_threads)]
+        
+        # 每个工作线程独占的消息计数槽位，重启前的计数累计保留
+        self.retired_message_count += sum(self.worker_message_counts)
+        self.worker_message_counts = [0] * self.num_midi_threads
+        self.latency_sums = [0.0] * self.num_midi_threads
+        self.latency_counts = [0] * self.num_midi_threads
+        self.latency_peaks = [0.0] * self.num_midi_threads
+        self.parse_queue = queue.Queue(maxsize=100)
         
         # 创建多个MIDI工作线程
         self.midi_threads = []
@@ -799,10 +1258,15 @@ class MidiPlayerApp(QMainWindow):
         self.fps_timer.timeout.connect(self.update_fps_counter)
         self.fps_timer.start(1000)  # 每秒更新一次
         
-        # 性能监控定时器（10ms更新一次）
+        # 日志显示定时器
+        self.log_drain_timer = QTimer()
+        self.log_drain_timer.timeout.connect(self.drain_log)
+        self.log_drain_timer.start(200)  # 200ms批量显示一次
+        
+        # 界面帧定时器（进度、活跃音符、性能数据、FPS合并刷新）
         self.performance_timer = QTimer()
         self.performance_timer.timeout.connect(self.update_performance_data)
-        self.performance_timer.start(10)  # 10ms更新一次
+        self.performance_timer.start(100)  # 100ms更新一次
         
         # 实时性能显示定时器
         self.realtime_timer = QTimer()
@@ -824,7 +1288,7 @@ class MidiPlayerApp(QMainWindow):
         """切换显示活跃音符"""
         self.show_active_notes = (state == Qt.CheckState.Checked)
         if not self.show_active_notes:
-            self.active_notes_table.setRowCount(0)
+            self.hide_active_note_rows(set())
             if hasattr(self, 'float_window') and self.float_window.isVisible():
                 self.float_window.update_notes([])
     
@@ -838,13 +1302,8 @@ class MidiPlayerApp(QMainWindow):
         self.stop_event.clear()
         
         # 根据模式重新配置线程
-        if self.black_midi_mode:
-            import multiprocessing
-            self.num_midi_threads = multiprocessing.cpu_count() * 2
-            self.batch_size = 100
-        else:
-            self.num_midi_threads = 2
-            self.batch_size = 10
+        self.num_midi_threads = self.cpu_count * 2 if self.black_midi_mode else 2
+        self.batch_size = 100 if self.black_midi_mode else 10
         
         # 重启线程
         self.init_threads()
@@ -872,50 +1331,53 @@ class MidiPlayerApp(QMainWindow):
                     self.port1_out = mido.open_output(port_name, latency=0.001)
                     self.port1_connected = True
                     self.port1_name = port_name
+                    self._refresh_port_senders()
                     self.update_port_status.emit(1, True)
                     self.log(f"端口1连接成功: {port_name}", "info")
                     self.global_status.setText(f"端口1已连接: {port_name}")
-                    self.global_status.setStyleSheet("color: #28a745; font-weight: bold;")
+                    self.set_status_style(self.global_status, "ok")
             else:
                 port_name = self.port2_combo.currentText()
                 if port_name:
                     self.port2_out = mido.open_output(port_name, latency=0.001)
                     self.port2_connected = True
                     self.port2_name = port_name
+                    self._refresh_port_senders()
                     self.update_port_status.emit(2, True)
                     self.log(f"端口2连接成功: {port_name}", "info")
                     self.global_status.setText(f"端口2已连接: {port_name}")
-                    self.global_status.setStyleSheet("color: #28a745; font-weight: bold;")
+                    self.set_status_style(self.global_status, "ok")
         except Exception as e:
             self.log(f"端口{port_num}连接失败: {str(e)}", "error")
             self.global_status.setText(f"端口{port_num}连接失败")
-            self.global_status.setStyleSheet("color: #dc3545; font-weight: bold;")
+            self.set_status_style(self.global_status, "error")
     
     def disconnect_port(self, port_num):
         """断开MIDI端口连接"""
         try:
             if port_num == 1 and self.port1_connected:
-                self.port1_out.close()
                 self.port1_connected = False
+                self._refresh_port_senders()
+                self.port1_out.close()
                 self.update_port_status.emit(1, False)
                 self.log(f"端口1断开连接: {self.port1_name}", "info")
             elif port_num == 2 and self.port2_connected:
-                self.port2_out.close()
                 self.port2_connected = False
+                self._refresh_port_senders()
+                self.port2_out.close()
                 self.update_port_status.emit(2, False)
                 self.log(f"端口2断开连接: {self.port2_name}", "info")
             
             # 更新全局状态
-            active_ports = sum([self.port1_connected, self.port2_connected])
-            if active_ports == 0:
+            if not (self.port1_connected or self.port2_connected):
                 self.global_status.setText("就绪")
-                self.global_status.setStyleSheet("color: #61c0bf; font-weight: bold;")
+                self.set_status_style(self.global_status, "info")
             elif self.port1_connected:
                 self.global_status.setText(f"端口1已连接: {self.port1_name}")
-                self.global_status.setStyleSheet("color: #28a745; font-weight: bold;")
+                self.set_status_style(self.global_status, "ok")
             else:
                 self.global_status.setText(f"端口2已连接: {self.port2_name}")
-                self.global_status.setStyleSheet("color: #28a745; font-weight: bold;")
+                self.set_status_style(self.global_status, "ok")
                 
         except Exception as e:
             self.log(f"端口{port_num}断开失败: {str(e)}", "error")
@@ -927,26 +1389,20 @@ class MidiPlayerApp(QMainWindow):
             test_notes = [60, 64, 67]  # C4, E4, G4
             
             for note in test_notes:
-                if self.port1_connected:
-                    self.port1_out.send(Message('note_on', note=note, velocity=64))
-                if self.port2_connected:
-                    self.port2_out.send(Message('note_on', note=note, velocity=64))
+                self.send_midi_message(bytes((0x90, note, 64)))
             
             time.sleep(0.5)
             
             for note in test_notes:
-                if self.port1_connected:
-                    self.port1_out.send(Message('note_off', note=note, velocity=64))
-                if self.port2_connected:
-                    self.port2_out.send(Message('note_off', note=note, velocity=64))
+                self.send_midi_message(bytes((0x80, note, 64)))
             
             self.log("连接测试完成", "info")
             self.global_status.setText("连接测试完成")
-            self.global_status.setStyleSheet("color: #61c0bf; font-weight: bold;")
+            self.set_status_style(self.global_status, "info")
         except Exception as e:
             self.log(f"连接测试失败: {str(e)}", "error")
             self.global_status.setText("连接测试失败")
-            self.global_status.setStyleSheet("color: #dc3545; font-weight: bold;")
+            self.set_status_style(self.global_status, "error")
     
     def add_files(self):
         """添加MIDI文件"""
@@ -954,13 +1410,16 @@ class MidiPlayerApp(QMainWindow):
         if files:
             added_count = 0
             for file in files:
-                if file not in self.playlist:
-                    self.playlist.append(file)
+                file_name = os.path.basename(file)
+                paths = self.playlist_by_name.get(file_name)
+                if paths is None or file not in paths:
+                    self.playlist.append((file, file_name))
+                    self.playlist_by_name.setdefault(file_name, []).append(file)
                     added_count += 1
             self.update_file_list.emit(self.playlist)
             self.log(f"添加了 {added_count} 个文件", "info")
             self.global_status.setText(f"已添加 {added_count} 个文件")
-            self.global_status.setStyleSheet("color: #61c0bf; font-weight: bold;")
+            self.set_status_style(self.global_status, "info")
     
     def remove_file(self):
         """移除选中文件"""
@@ -968,42 +1427,42 @@ class MidiPlayerApp(QMainWindow):
         if selected_items:
             removed_count = 0
             for item in selected_items:
-                file_name = item.text()
-                # 在播放列表中查找完整路径
-                for file_path in self.playlist:
-                    if os.path.basename(file_path) == file_name:
-                        index = self.playlist.index(file_path)
-                        self.playlist.pop(index)
-                        if self.current_file_index == index:
-                            self.stop_playback()
-                            self.current_file_index = -1
-                        removed_count += 1
-                        break
+                # 按文件名索引查找完整路径
+                paths = self.playlist_by_name.get(item.text())
+                if paths:
+                    file_path = paths.pop(0)
+                    if not paths:
+                        del self.playlist_by_name[item.text()]
+                    index = self.playlist.index((file_path, item.text()))
+                    self.playlist.pop(index)
+                    if self.current_file_index == index:
+                        self.stop_playback()
+                        self.current_file_index = -1
+                    removed_count += 1
             self.update_file_list.emit(self.playlist)
             self.log(f"移除了 {removed_count} 个文件", "info")
             self.global_status.setText(f"已移除 {removed_count} 个文件")
-            self.global_status.setStyleSheet("color: #61c0bf; font-weight: bold;")
+            self.set_status_style(self.global_status, "info")
     
     def clear_files(self):
         """清空文件列表"""
         self.stop_playback()
         file_count = len(self.playlist)
         self.playlist.clear()
+        self.playlist_by_name.clear()
         self.current_file_index = -1
         self.update_file_list.emit(self.playlist)
         self.log("文件列表已清空", "info")
         self.global_status.setText(f"文件列表已清空 ({file_count} 个文件)")
-        self.global_status.setStyleSheet("color: #61c0bf; font-weight: bold;")
+        self.set_status_style(self.global_status, "info")
     
     def on_file_double_clicked(self, item):
         """文件双击播放"""
-        file_name = item.text()
-        # 在播放列表中查找完整路径
-        for i, file_path in enumerate(self.playlist):
-            if os.path.basename(file_path) == file_name:
-                self.current_file_index = i
-                self.play_current_file()
-                break
+        # 按文件名索引查找完整路径
+        paths = self.playlist_by_name.get(item.text())
+        if paths:
+            self.current_file_index = self.playlist.index((paths[0], item.text()))
+            self.play_current_file()
     
     def toggle_play_pause(self):
         """切换播放/暂停"""
@@ -1021,66 +1480,112 @@ class MidiPlayerApp(QMainWindow):
     def play_current_file(self):
         """播放当前文件"""
         if self.current_file_index >= 0 and self.current_file_index < len(self.playlist):
-            file_path = self.playlist[self.current_file_index]
-            self.load_and_play_midi(file_path)
+            file_path, file_name = self.playlist[self.current_file_index]
+            self.load_and_play_midi(file_path, file_name)
     
-    def load_and_play_midi(self, file_path):
+    def load_and_play_midi(self, file_path, file_name=None):
         """加载并播放MIDI文件"""
         try:
+            if file_name is None:
+                file_name = os.path.basename(file_path)
+            
             # 停止当前播放
             self.stop_playback()
             
             # 清空队列
             self.clear_queues()
             
-            # 解析MIDI文件
-            midi_file = MidiFile(file_path)
-            self.total_time = midi_file.length
+            # 解析MIDI文件（黑乐谱模式下整个解析交给解析线程，避免阻塞界面）
+            midi_file = None
+            self.total_time = 0
+            if not self.black_midi_mode:
+                midi_file = MidiFile(file_path)
+                self.total_time = midi_file.length
             
             # 重置所有相关状态
-            self.message_count = 0
+            self.message_count_base = self.session_message_count()
             self.current_time = 0
             self.playback_complete = False
-            self.start_time = time.time()
+            self.start_time = time.perf_counter_ns()
             self.is_playing = True
             self.is_paused = False
             
             # 提取MIDI文件中的音乐信息
-            self.extract_midi_info(midi_file)
-            
-            # 更新音乐信息显示
-            self.update_music_info_display()
+            if midi_file is not None:
+                self.extract_midi_info(midi_file)
+                
+                # 更新音乐信息显示
+                self.update_music_info_display()
             
             # 将解析任务放入队列
-            self.parse_queue.put((midi_file, file_path))
+            self.play_generation += 1
+            self.parse_queue.put((midi_file, file_path, self.play_generation))
             
             # 更新UI
-            self.update_playback_ui(f"播放中: {os.path.basename(file_path)}", "#28a745")
+            self.update_playback_ui(f"播放中: {file_name}", "ok")
             
             self.log(f"开始播放: {file_path}", "info")
-            self.global_status.setText(f"播放中: {os.path.basename(file_path)}")
-            self.global_status.setStyleSheet("color: #28a745; font-weight: bold;")
+            self.global_status.setText(f"播放中: {file_name}")
+            self.set_status_style(self.global_status, "ok")
             
         except Exception as e:
             self.log(f"播放失败: {str(e)}", "error")
             self.global_status.setText("播放失败")
-            self.global_status.setStyleSheet("color: #dc3545; font-weight: bold;")
+            self.set_status_style(self.global_status, "error")
             self.stop_playback()
     
     def extract_midi_info(self, midi_file):
-        """提取MIDI文件中的音乐信息"""
+        """提取MIDI文件中的初始音乐信息（三类元消息都找到后提前结束）"""
         self.current_tempo = 120
         self.current_time_signature = (4, 4)
         self.current_key = None
         
-        for track in midi_file.tracks:
+        if not midi_file.tracks:
+            return
+        
+        # 调号/拍号/速度只从0号音轨读取，播放中的变化由handle_meta_message处理
+        need = {'set_tempo', 'time_signature', 'key_signature'}
+        for msg in midi_file.tracks[0]:
+            if msg.type in need:
+                need.discard(msg.type)
+                self.apply_meta_info(msg)
+                if not need:
+                    return
+        
+        # 0号音轨缺少的信息只在其他音轨开头（第0拍）的元消息中查找，不扫描整条音轨
+        for track in midi_file.tracks[1:]:
             for msg in track:
-                if msg.type == 'set_tempo':
-                    self.current_tempo = round(mido.tempo2bpm(msg.tempo))
-                elif msg.type == 'time_signature':
-                    self.current_time_signature = (msg.numerator, msg.denominator)
-                elif msg.type == 'key_signature':
-                    self.current_key = msg.key
+                if msg.time > 0:
+                    break
+                if msg.type in need:
+                    need.discard(msg.type)
+                    self.apply_meta_info(msg)
+                    if not need:
+                        return
+    
+    def extract_event_info(self, events):
+        """从解码事件中提取初始音乐信息"""
+        self.current_tempo = 120
+        self.current_time_signature = (4, 4)
+        self.current_key = None
+        
+        need = {'set_tempo', 'time_signature', 'key_signature'}
+        for _, msg in events:
+            if msg.__class__ is not bytes and msg.type in need:
+                need.discard(msg.type)
+                self.apply_meta_info(msg)
+                if not need:
+                    break
+        self.update_music_info.emit()
+    
+    def apply_meta_info(self, msg):
+        """用元消息更新速度/拍号/调号"""
+        if msg.type == 'set_tempo':
+            self.current_tempo = round(mido.tempo2bpm(msg.tempo))
+        elif msg.type == 'time_signature':
+            self.current_time_signature = (msg.numerator, msg.denominator)
+        elif msg.type == 'key_signature':
+            self.current_key = msg.key
     
     def update_music_info_display(self):
         """更新音乐信息显示"""
@@ -1105,40 +1610,30 @@ class MidiPlayerApp(QMainWindow):
     
     def get_key_name(self):
         """将调号转换为中文名称"""
-        key_names = {
-            'C': 'C大调', 'a': 'a小调',
-            'G': 'G大调', 'e': 'e小调',
-            'D': 'D大调', 'b': 'b小调',
-            'A': 'A大调', 'f#': '升f小调',
-            'E': 'E大调', 'c#': '升c小调',
-            'B': 'B大调', 'g#': '升g小调',
-            'F#': '升F大调', 'd#': '升d小调',
-            'Gb': '降G大调', 'bb': '降b小调',
-            'Db': '降D大调', 'ab': '降a小调',
-            'Ab': '降A大调', 'f': 'f小调',
-            'Eb': '降E大调', 'c': 'c小调',
-            'Bb': '降B大调', 'g': 'g小调',
-            'F': 'F大调', 'd': 'd小调'
-        }
-        return key_names.get(self.current_key, self.current_key) if self.current_key else "未知"
+        # 调号很少变化，未变化时直接返回上次的结果
+        key = self.current_key
+        if key != self.key_name_source:
+            self.key_name_source = key
+            self.key_name_text = KEY_NAMES.get(key, key) if key else "未知"
+        return self.key_name_text
     
     def pause_playback(self):
         """暂停播放"""
         if self.is_playing and not self.is_paused:
             self.is_paused = True
             self.pause_event.clear()
-            self.update_playback_ui("已暂停", "#ffc107")
+            self.update_playback_ui("已暂停", "warning")
             self.log("播放已暂停", "info")
             self.global_status.setText("播放已暂停")
-            self.global_status.setStyleSheet("color: #ffc107; font-weight: bold;")
+            self.set_status_style(self.global_status, "warning")
         elif self.is_playing and self.is_paused:
             self.is_paused = False
             self.pause_event.set()
-            current_file = os.path.basename(self.playlist[self.current_file_index]) if self.playlist and self.current_file_index != -1 else ""
-            self.update_playback_ui(f"播放中: {current_file}", "#28a745")
+            current_file = self.playlist[self.current_file_index][1] if self.playlist and self.current_file_index != -1 else ""
+            self.update_playback_ui(f"播放中: {current_file}", "ok")
             self.log("播放已恢复", "info")
             self.global_status.setText(f"播放中: {current_file}")
-            self.global_status.setStyleSheet("color: #28a745; font-weight: bold;")
+            self.set_status_style(self.global_status, "ok")
     
     def stop_playback(self):
         """停止播放"""
@@ -1147,6 +1642,8 @@ class MidiPlayerApp(QMainWindow):
         self.playback_complete = False
         self.pause_event.set()
         self.start_time = None
+        self.play_generation += 1
+        self.reset_latency_stats()
         
         # 发送所有音符关闭消息
         self.all_notes_off()
@@ -1155,27 +1652,27 @@ class MidiPlayerApp(QMainWindow):
         self.clear_queues()
         
         # 更新UI
-        self.update_playback_ui("已停止", "#dc3545")
+        self.update_playback_ui("已停止", "error")
         
         # 清空活跃音符
-        self.active_notes.clear()
+        self.clear_active_notes()
+        self.active_notes_frame = None
         self.update_active_notes.emit([])
         
         # 更新乐理信息
+        self.theory_frame = None
+        self.last_theory_text = None
         self.update_music_theory.emit("等待音符播放...\n\n功能说明：将显示当前音符的乐理信息、和弦分析及音程关系")
         
         self.log("播放已停止", "info")
         self.global_status.setText("就绪")
-        self.global_status.setStyleSheet("color: #61c0bf; font-weight: bold;")
+        self.set_status_style(self.global_status, "info")
     
     def clear_queues(self):
         """清空所有队列"""
         try:
-            while True:
-                try:
-                    self.midi_event_queue.get_nowait()
-                except queue.Empty:
-                    break
+            for ring in self.midi_rings:
+                ring.clear()
             while True:
                 try:
                     self.parse_queue.get_nowait()
@@ -1184,17 +1681,18 @@ class MidiPlayerApp(QMainWindow):
         except Exception as e:
             self.log(f"清空队列错误: {str(e)}", "error", is_fatal=False)
     
-    def update_playback_ui(self, status_text, color):
+    def update_playback_ui(self, status_text, status):
         """更新播放UI状态"""
-        self.update_status.emit(status_text, color)
+        self.update_status.emit(status_text, status)
         if "播放中" in status_text:
             self.play_btn.setText("暂停")
         elif "已暂停" in status_text:
             self.play_btn.setText("播放")
         else:
             self.play_btn.setText("播放")
+            self.last_progress_frame = None
             self.progress_bar.setValue(0)
-            self.time_label.setText("00:00 / 00:00")
+            self.progress_bar.setFormat("00:00 / 00:00")
     
     def play_previous(self):
         """播放上一首"""
@@ -1217,21 +1715,12 @@ class MidiPlayerApp(QMainWindow):
     def all_notes_off(self):
         """关闭所有音符"""
         try:
-            for channel in range(16):
-                cc_message = Message('control_change', channel=channel, control=123, value=0)
-                if self.port1_connected:
-                    self.port1_out.send(cc_message)
-                if self.port2_connected:
-                    self.port2_out.send(cc_message)
-            
-            for note in list(self.active_notes.keys()):
-                note_off = Message('note_off', note=note, velocity=0)
-                if self.port1_connected:
-                    self.port1_out.send(note_off)
-                if self.port2_connected:
-                    self.port2_out.send(note_off)
-            
-            self.active_notes.clear()
+            messages = ALL_NOTES_OFF_MESSAGES + tuple(NOTE_OFF_MESSAGES[note] for note in self.active_note_numbers())
+            for send in self.port_senders:
+                for data in messages:
+                    send(data)
+            
+            self.clear_active_notes()
             self.update_active_notes.emit([])
         except Exception as e:
             self.log(f"关闭所有音符失败: {str(e)}", "error")
@@ -1240,30 +1729,89 @@ class MidiPlayerApp(QMainWindow):
         """文件解析工作线程"""
         while not self.stop_event.is_set():
             try:
-                midi_file, file_path = self.parse_queue.get(timeout=0.1)
+                midi_file, file_path, generation = self.parse_queue.get(timeout=0.1)
+                
+                events = None
+                
+                # 黑乐谱模式：在解析进程中直接解码文件字节，避免逐事件创建Message对象
+                if self.black_midi_mode:
+                    try:
+                        events = self.decode_in_pool(file_path, self.filter_zero_velocity_check.isChecked())
+                    except Exception as fast_e:
+                        self.log(f"快速解析失败，改用mido解析: {str(fast_e)}", "warning")
+                        events = None
+                    
+                    # 解码期间已切换或停止播放，丢弃结果
+                    if generation != self.play_generation:
+                        self.parse_queue.task_done()
+                        continue
+                    
+                    if events is not None:
+                        # 总时长和音乐信息直接取自解码结果
+                        self.total_time = events[-1][0] if events else 0
+                        self.extract_event_info(events)
                 
-                start_time = time.time()
-                events = []
-                current_time = 0
+                if events is None and midi_file is None:
+                    # 快速解析不可用时在解析线程中用mido加载
+                    midi_file = MidiFile(file_path)
+                    self.total_time = midi_file.length
+                    self.extract_midi_info(midi_file)
+                    self.update_music_info.emit()
                 
-                for msg in midi_file:
-                    current_time += msg.time
+                if events is None:
+                    events = []
+                    current_time = 0
                     
-                    if msg.type in ['note_on', 'note_off', 'control_change', 
-                                   'program_change', 'pitchwheel', 'set_tempo',
-                                   'time_signature', 'key_signature']:
-                        # 黑乐谱优化：过滤力度为0的note_on事件
-                        if (self.black_midi_mode and self.filter_zero_velocity_check.isChecked() and
-                            msg.type == 'note_on' and msg.velocity == 0):
-                            continue
+                    # 循环外取好过滤条件和方法引用，避免逐事件访问属性和调用Qt
+                    filter_zero = self.black_midi_mode and self.filter_zero_velocity_check.isChecked()
+                    append = events.append
+                    
+                    # 直接遍历合并后的音轨并就地换算时间，省去MidiFile迭代时逐条复制消息
+                    merged = getattr(midi_file, 'merged_track', None)
+                    if merged is None:
+                        merged = mido.merge_tracks(midi_file.tracks)
+                    tick_scale = 500000 * 1e-6 / midi_file.ticks_per_beat
+                    
+                    for msg in merged:
+                        if msg.time > 0:
+                            current_time += msg.time * tick_scale
+                        
+                        msg_type = msg.type
+                        if msg_type in PARSE_CHANNEL_TYPES:
+                            # 黑乐谱优化：过滤力度为0的note_on事件
+                            if filter_zero and msg_type == 'note_on' and msg.velocity == 0:
+                                continue
                             
-                        events.append((current_time, msg))
+                            # 通道消息统一转为原始字节，与快速解析路径保持一致
+                            append((current_time, bytes(msg.bytes())))
+                        elif msg_type in PARSE_META_TYPES:
+                            append((current_time, msg))
+                            if msg_type == 'set_tempo':
+                                tick_scale = msg.tempo * 1e-6 / midi_file.ticks_per_beat
                 
                 self.log(f"解析完成: {file_path}, 事件数: {len(events)}", "debug")
                 
-                # 将事件放入MIDI事件队列
+                # 解析期间已切换或停止播放，丢弃结果
+                if generation != self.play_generation:
+                    self.parse_queue.task_done()
+                    continue
+                
+                # 解析线程中加载的文件从解析完成时开始计时
+                if self.black_midi_mode:
+                    self.start_time = time.perf_counter_ns()
+                
+                # 将事件分发到各工作线程的环形缓冲区
+                # 按通道分片保证同一通道内的事件顺序，元消息固定交给0号线程
+                rings = self.midi_rings
+                num_rings = len(rings)
+                # 分发期间切换到其他文件即停止，旧歌曲的事件不会写入新歌曲的缓冲区
+                push_midi_event = self.push_midi_event
                 for event_time, msg in events:
-                    self.midi_event_queue.put((event_time, msg))
+                    if generation != self.play_generation:
+                        break
+                    ring = rings[(msg[0] & 0x0F) % num_rings] if msg.__class__ is bytes else rings[0]
+                    if not push_midi_event(ring, event_time, msg, generation):
+                        break
                 
                 self.parse_queue.task_done()
                 
@@ -1273,13 +1821,60 @@ class MidiPlayerApp(QMainWindow):
                 self.log(f"解析线程错误: {str(e)}", "error", is_fatal=False)
                 continue
     
+    def decode_in_pool(self, file_path, filter_zero_velocity):
+        """在解析进程池中解码文件，进程池不可用时在当前线程解码"""
+        try:
+            if self.parse_pool is None:
+                # 使用spawn启动，避免在多线程的Qt进程中fork
+                self.parse_pool = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn'))
+            return self.parse_pool.submit(decode_midi_file, file_path, filter_zero_velocity).result()
+        except (OSError, RuntimeError, pickle.PicklingError) as pool_e:
+            # BrokenProcessPool属于RuntimeError
+            self.log(f"解析进程不可用，改为线程内解析: {str(pool_e)}", "warning")
+            self.parse_pool = None
+            return decode_midi_file(file_path, filter_zero_velocity)
+    
+    def push_midi_event(self, ring, event_time, msg, generation):
+        """写入事件，缓冲区满时等待消费者，播放停止或已切换到其他文件则放弃"""
+        while not ring.push(event_time, msg):
+            if self.stop_event.is_set() or not self.is_playing or generation != self.play_generation:
+                return False
+            time.sleep(0.001)
+        return True
+    
+    def reset_latency_stats(self):
+        """清零各工作线程的发送延迟累计值（原地清零，工作线程持有列表引用）"""
+        for i in range(len(self.latency_counts)):
+            self.latency_sums[i] = 0.0
+            self.latency_counts[i] = 0
+            self.latency_peaks[i] = 0.0
+    
+    def session_message_count(self):
+        """会话累计发送的MIDI消息数"""
+        return self.retired_message_count + sum(self.worker_message_counts)
+    
+    def message_count(self):
+        """当前歌曲发送的MIDI消息数"""
+        return self.session_message_count() - self.message_count_base
+    
+    def midi_events_pending(self):
+        """所有环形缓冲区中未发送的事件数（直接读取生产/消费计数，不加锁）"""
+        return sum(len(ring) for ring in self.midi_rings)
+    
     def midi_worker(self, thread_id):
         """MIDI发送工作线程"""
-        local_event_count = 0
+        self.set_realtime_priority(thread_id)
+        ring = self.midi_rings[thread_id]
+        message_counts = self.worker_message_counts
+        latency_sums = self.latency_sums
+        latency_counts = self.latency_counts
+        latency_peaks = self.latency_peaks
         
         while not self.stop_event.is_set():
             try:
                 if not self.is_playing or self.playback_complete:
+                    # 空闲时也执行清空请求，及时释放已停止歌曲的消息
+                    ring.discard_cleared()
                     time.sleep(0.001 if self.black_midi_mode else 0.01)
                     continue
                 
@@ -1288,58 +1883,59 @@ class MidiPlayerApp(QMainWindow):
                 
                 # 确保开始时间有效
                 if self.start_time is None:
-                    self.start_time = time.time()
+                    self.start_time = time.perf_counter_ns()
+                start_time = self.start_time
                 
-                # 获取当前播放时间
-                elapsed_time = time.time() - self.start_time
+                # 获取当前播放时间（整数纳秒差值，最后再换算为秒）
+                elapsed_time = (time.perf_counter_ns() - start_time) / 1e9
                 
-                # 处理队列中的事件
-                event_processed = False
+                # 一次取出所有已到时间的事件（最多batch_size个，同刻事件整组取出），元消息直接处理
                 batch_size = 100 if self.black_midi_mode else 10
-                batch_count = 0
+                batch = ring.pop_due(elapsed_time, batch_size)
+                due_count = len(batch)
+                # 元消息只会分发到0号线程，通道消息均为原始字节
+                if thread_id == 0 and due_count:
+                    due = batch
+                    batch = []
+                    for msg in due:
+                        if msg.__class__ is bytes:
+                            batch.append(msg)
+                        else:
+                            self.handle_meta_message(msg)
+                batch_count = len(batch)
+                event_processed = batch_count > 0
                 
-                while (not self.midi_event_queue.empty() and self.is_playing and 
-                       not self.playback_complete and batch_count < batch_size):
+                if event_processed and self.is_playing and not self.playback_complete:
+                    # 每跨过64条消息采样一次发送延迟，其余批次不计时
+                    sent_before = message_counts[thread_id]
+                    sample_latency = (sent_before >> 6) != ((sent_before + batch_count) >> 6)
+                    if sample_latency:
+                        start_send = time.perf_counter_ns()
                     
-                    event_time, msg = self.midi_event_queue.queue[0]
+                    # 整批发送，端口发送函数缓存在局部变量中
+                    senders = self.port_senders
+                    try:
+                        for send in senders:
+                            for data in batch:
+                                send(data)
+                    except Exception as send_e:
+                        self.log(f"MIDI发送错误: {str(send_e)}", "error", is_fatal=False)
                     
-                    if event_time <= elapsed_time:
-                        # 弹出事件
-                        self.midi_event_queue.get()
-                        event_processed = True
-                        batch_count += 1
-                        
-                        # 记录开始时间用于延迟计算
-                        start_send = time.time()
-                        
-                        # 处理元消息（只在主线程处理）
-                        if msg.is_meta:
-                            if thread_id == 0:
-                                self.handle_meta_message(msg)
-                            continue
-                        
-                        # 发送MIDI消息到连接的端口
-                        self.send_midi_message(msg)
-                        
-                        # 计算延迟
-                        latency = (time.time() - start_send) * 1000
-                        self.queue_lengths.append(latency)
-                        if len(self.queue_lengths) > 100:
-                            self.queue_lengths.pop(0)
-                        
-                        # 更新消息计数
-                        local_event_count += 1
-                        if local_event_count >= 100:
-                            with self.counter_lock:
-                                self.message_count += local_event_count
-                                self.session_message_count += local_event_count
-                            local_event_count = 0
-                        
-                        # 处理音符事件
-                        self.handle_note_event(msg)
-                        
-                    else:
-                        break
+                    # 计算平均每条消息的发送延迟
+                    if sample_latency:
+                        latency = (time.perf_counter_ns() - start_send) / 1e6 / batch_count
+                        latency_sums[thread_id] += latency
+                        latency_counts[thread_id] += 1
+                        if latency > latency_peaks[thread_id]:
+                            latency_peaks[thread_id] = latency
+                    
+                    # 更新消息计数（本线程独占槽位）
+                    message_counts[thread_id] = sent_before + batch_count
+                    
+                    # 处理音符事件
+                    handle_note_event = self.handle_note_event
+                    for data in batch:
+                        handle_note_event(data)
                 
                 # 更新当前播放时间
                 self.current_time = elapsed_time
@@ -1347,18 +1943,17 @@ class MidiPlayerApp(QMainWindow):
                 # 检查播放是否完成
                 self.check_playback_complete(elapsed_time, event_processed)
                 
-                # 更新进度（黑乐谱模式下降低更新频率）
-                if (self.total_time > 0 and (not self.black_midi_mode or 
-                    (self.black_midi_mode and batch_count % 10 == 0))):
-                    progress = int((self.current_time / self.total_time) * 1000)
-                    time_text = f"{self.format_time(self.current_time)} / {self.format_time(self.total_time)}"
-                    self.update_progress.emit(progress, 1000, time_text)
-                
-                # 根据是否处理了事件调整睡眠时间
-                if event_processed:
-                    time.sleep(0.0001 if self.black_midi_mode else 0.001)
+                # 批次已满说明还有到期事件，让出CPU后立即继续
+                if due_count >= batch_size:
+                    time.sleep(0)
+                elif ring.empty():
+                    # 队列为空时等待生产者唤醒
+                    ring.wait(0.001 if self.black_midi_mode else 0.01)
                 else:
-                    time.sleep(0.001 if self.black_midi_mode else 0.01)
+                    # 按队首事件的到期时间睡眠，最长10ms以便及时响应暂停/停止
+                    delay = ring.peek_time() - (time.perf_counter_ns() - start_time) / 1e9
+                    if delay > 0:
+                        self.stop_event.wait(min(delay, 0.01))
                     
             except Exception as e:
                 # 记录非致命错误，不影响线程继续运行
@@ -1366,35 +1961,62 @@ class MidiPlayerApp(QMainWindow):
                 time.sleep(0.1)
                 continue
     
+    def set_realtime_priority(self, thread_id):
+        """尽量提升当前发送线程的系统优先级并绑定CPU核心，权限不足时保持默认"""
+        try:
+            if sys.platform.startswith('linux'):
+                tid = threading.get_native_id()
+                os.sched_setscheduler(tid, os.SCHED_FIFO, os.sched_param(20))
+                # 在进程允许的核心中轮流分配
+                cpus = sorted(os.sched_getaffinity(0))
+                os.sched_setaffinity(tid, {cpus[thread_id % len(cpus)]})
+            elif sys.platform == 'win32':
+                import ctypes
+                kernel32 = ctypes.windll.kernel32
+                # THREAD_PRIORITY_TIME_CRITICAL = 15
+                kernel32.SetThreadPriority(kernel32.GetCurrentThread(), 15)
+        except (OSError, AttributeError) as e:
+            self.log(f"MIDI线程{thread_id}无法设置实时优先级: {str(e)}", "debug")
+    
     def handle_meta_message(self, msg):
         """处理元消息"""
         try:
-            if msg.type == 'set_tempo':
-                self.current_tempo = round(mido.tempo2bpm(msg.tempo))
-                self.bpm_label.setText(f"速度: {self.current_tempo} BPM ({self.get_tempo_name()})")
-            elif msg.type == 'time_signature':
-                self.current_time_signature = (msg.numerator, msg.denominator)
-                self.time_sig_label.setText(f"拍号: {self.current_time_signature[0]}/{self.current_time_signature[1]}")
-            elif msg.type == 'key_signature':
-                self.current_key = msg.key
-                self.key_label.setText(f"调号: {self.get_key_name() if self.current_key is not None else '未知'}")
+            self.apply_meta_info(msg)
+            # 工作线程不直接操作控件，交给界面线程刷新
+            self.update_music_info.emit()
         except Exception as e:
             self.log(f"处理元消息错误: {str(e)}", "error", is_fatal=False)
     
-    def send_midi_message(self, msg):
-        """发送MIDI消息"""
+    def send_midi_message(self, data):
+        """发送原始字节MIDI消息"""
         try:
-            if self.port1_connected:
-                self.port1_out.send(msg)
-            if self.port2_connected:
-                self.port2_out.send(msg)
+            for send in self.port_senders:
+                send(data)
         except Exception as send_e:
             self.log(f"MIDI发送错误: {str(send_e)}", "error", is_fatal=False)
     
+    def _refresh_port_senders(self):
+        """重建已连接端口的发送函数列表"""
+        senders = []
+        for connected, port in ((self.port1_connected, self.port1_out),
+                                (self.port2_connected, self.port2_out)):
+            if connected and port is not None:
+                senders.append(self.make_raw_sender(port))
+        self.port_senders = tuple(senders)
+    
+    def make_raw_sender(self, port):
+        """绕过mido消息封装直接写入rtmidi，不支持时退回port.send"""
+        rt = getattr(port, '_rt', None)
+        if rt is not None:
+            return rt.send_message
+        send = port.send
+        from_bytes = Message.from_bytes
+        return lambda data: send(from_bytes(data))
+    
     def check_playback_complete(self, elapsed_time, event_processed):
         """检查播放是否完成"""
         try:
-            if self.total_time > 0 and elapsed_time >= self.total_time and self.midi_event_queue.empty() and not event_processed:
+            if self.total_time > 0 and elapsed_time >= self.total_time and self.midi_events_pending() == 0 and not event_processed:
                 if not self.playback_complete:
                     self.log("播放完成", "info")
                     self.playback_complete = True
@@ -1405,39 +2027,45 @@ class MidiPlayerApp(QMainWindow):
     
     def note_worker(self):
         """音符处理工作线程"""
+        had_active = False
         while not self.stop_event.is_set():
             try:
-                if not self.is_playing or not self.active_notes or self.playback_complete or not self.show_active_notes:
+                active = self.active_note_numbers()
+                if not self.is_playing or not active or self.playback_complete or not self.show_active_notes:
+                    # 音符全部结束时清空一次显示
+                    if had_active and self.is_playing:
+                        self.active_notes_frame = []
+                    had_active = False
                     time.sleep(0.01)
                     continue
+                had_active = True
                 
                 # 更新活跃音符的时长
-                current_time = time.time()
+                current_time = time.perf_counter_ns()
                 updated_notes = []
                 
                 # 黑乐谱优化：限制活跃音符显示数量
-                display_limit = min(50, len(self.active_notes)) if self.black_midi_mode else len(self.active_notes)
+                if self.black_midi_mode:
+                    active = active[:50]
                 count = 0
                 
-                for note, info in list(self.active_notes.items()):
-                    if count >= display_limit:
-                        break
-                    duration = current_time - info['start_time']
-                    updated_info = info.copy()
-                    updated_info['duration'] = duration
+                note_start = self.note_start
+                note_velocity = self.note_velocity
+                for note in active:
+                    duration = (current_time - note_start[note]) / 1e9
                     updated_notes.append({
                         'note': note,
-                        'name': info['name'],
-                        'octave': info['octave'],
-                        'frequency': info['frequency'],
-                        'velocity': info['velocity'],
+                        'name': NOTE_NAME[note],
+                        'octave': NOTE_OCTAVE[note],
+                        'frequency': NOTE_FREQUENCY[note],
+                        'velocity': note_velocity[note],
                         'duration': round(duration, 2)
                     })
                     count += 1
                 
-                # 发送活跃音符更新
+                # 写入活跃音符快照，由界面帧定时器统一刷新
                 if updated_notes:
-                    self.update_active_notes.emit(updated_notes)
+                    self.active_notes_frame = updated_notes
                     
                     # 黑乐谱优化：降低乐理分析频率
                     if not self.black_midi_mode or (len(updated_notes) <= 5 and count % 5 == 0):
@@ -1454,43 +2082,43 @@ class MidiPlayerApp(QMainWindow):
                 time.sleep(0.1)
                 continue
     
-    def handle_note_event(self, msg):
-        """处理音符事件"""
+    def handle_note_event(self, data):
+        """处理音符事件（原始字节）"""
         try:
-            if msg.type == 'note_on' and msg.velocity > 0:
-                self.handle_note_on(msg.note, msg.velocity)
-            elif msg.type == 'note_off' or (msg.type == 'note_on' and msg.velocity == 0):
-                self.handle_note_off(msg.note)
+            kind = data[0] & 0xF0
+            if kind == 0x90 and data[2] > 0:
+                self.handle_note_on(data[1], data[2])
+            elif kind == 0x80 or kind == 0x90:
+                self.handle_note_off(data[1])
         except Exception as note_e:
             self.log(f"音符处理错误: {str(note_e)}", "error", is_fatal=False)
     
     def handle_note_on(self, note, velocity):
         """处理音符开启事件"""
         try:
-            note_info = self.get_note_info(note)
-            note_info['velocity'] = velocity
-            note_info['start_time'] = time.time()
-            
             # 黑乐谱优化：限制活跃音符数量
-            if self.black_midi_mode and len(self.active_notes) >= self.max_active_notes:
-                # 移除最旧的音符
-                if self.active_notes:
-                    oldest_note = min(self.active_notes.keys(), key=lambda x: self.active_notes[x]['start_time'])
-                    del self.active_notes[oldest_note]
+            if (self.black_midi_mode and not self.note_active[note]
+                    and self.note_active.count(1) >= self.max_active_notes):
+                # 达到上限时才构建活跃列表，移除最旧的音符
+                oldest_note = min(self.active_note_numbers(), key=self.note_start.__getitem__)
+                self.note_active[oldest_note] = 0
             
-            self.active_notes[note] = note_info
+            self.note_velocity[note] = velocity
+            self.note_start[note] = time.perf_counter_ns()
+            self.note_active[note] = 1
             
             # 添加到历史记录（黑乐谱模式下降低频率）
             if not self.black_midi_mode or (len(self.note_history) % 10 == 0):
-                self.note_history.appendleft({
-                    'time': datetime.now().strftime('%H:%M:%S'),
+                record = {
+                    'time': self.clock_text(),
                     'note': note,
-                    'name': note_info['name'],
-                    'octave': note_info['octave'],
+                    'name': NOTE_NAME[note],
+                    'octave': NOTE_OCTAVE[note],
                     'velocity': velocity,
                     'type': 'ON'
-                })
-                self.update_note_history.emit(list(self.note_history))
+                }
+                self.note_history.appendleft(record)
+                self.history_pending.append(record)
                 
         except Exception as e:
             self.log(f"处理音符开启错误: {str(e)}", "error", is_fatal=False)
@@ -1498,53 +2126,54 @@ class MidiPlayerApp(QMainWindow):
     def handle_note_off(self, note):
         """处理音符关闭事件"""
         try:
-            if note in self.active_notes:
+            if self.note_active[note]:
                 # 计算持续时间
-                duration = time.time() - self.active_notes[note]['start_time']
+                duration = (time.perf_counter_ns() - self.note_start[note]) / 1e9
                 
                 # 添加到历史记录（黑乐谱模式下降低频率）
                 if not self.black_midi_mode or (len(self.note_history) % 10 == 0):
-                    self.note_history.appendleft({
-                        'time': datetime.now().strftime('%H:%M:%S'),
+                    record = {
+                        'time': self.clock_text(),
                         'note': note,
-                        'name': self.active_notes[note]['name'],
-                        'octave': self.active_notes[note]['octave'],
+                        'name': NOTE_NAME[note],
+                        'octave': NOTE_OCTAVE[note],
                         'duration': round(duration, 2),
                         'type': 'OFF'
-                    })
-                    self.update_note_history.emit(list(self.note_history))
+                    }
+                    self.note_history.appendleft(record)
+                    self.history_pending.append(record)
                 
                 # 从活跃音符中移除
-                del self.active_notes[note]
+                self.note_active[note] = 0
                 
         except Exception as e:
             self.log(f"处理音符关闭错误: {str(e)}", "error", is_fatal=False)
     
+    def clock_text(self):
+        """当前时刻的时:分:秒文本，同一秒内复用缓存"""
+        now = int(time.time())
+        if now != self.clock_cache_sec:
+            self.clock_cache_sec = now
+            self.clock_cache_text = time.strftime('%H:%M:%S', time.localtime(now))
+        return self.clock_cache_text
+    
+    def active_note_numbers(self):
+        """当前活跃的音符号列表（升序）"""
+        return [note for note, active in enumerate(self.note_active) if active]
+    
+    def clear_active_notes(self):
+        """清空活跃音符数组"""
+        self.note_active[:] = bytes(128)
+    
     def get_note_info(self, note):
-        """获取音符信息"""
-        note_names = ['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B']
-        note_index = note % 12
-        octave = (note // 12) - 1
-        name = note_names[note_index]
-        
-        # 计算频率
-        frequency = 440.0 * (2.0 ** ((note - 69) / 12.0))
-        
-        return {
-            'name': name,
-            'octave': octave,
-            'frequency': round(frequency, 2)
-        }
+        """获取音符信息（返回预计算模板的副本）"""
+        return dict(NOTE_INFO[note])
     
     def analyze_current_notes(self, notes):
         """分析当前音符并生成乐理知识信息"""
         if not notes or not self.show_active_notes:
             return
             
-        # 提取音符名称和八度
-        note_names = [f"{note['name']}{note['octave']}" for note in notes]
-        note_numbers = [note['note'] for note in notes]
-        
         # 单音符分析
         if len(notes) == 1:
             note = notes[0]
@@ -1554,13 +2183,17 @@ class MidiPlayerApp(QMainWindow):
             theory_text = self.analyze_chord(notes)
         
         # 添加通用音乐信息
-        theory_text += "\n\n"
-        theory_text += f"拍号: {self.current_time_signature[0]}/{self.current_time_signature[1]}\n"
-        theory_text += f"速度: {self.current_tempo} BPM ({self.get_tempo_name()})\n"
+        parts = [theory_text,
+                 f"\n\n拍号: {self.current_time_signature[0]}/{self.current_time_signature[1]}\n"
+                 f"速度: {self.current_tempo} BPM ({self.get_tempo_name()})\n"]
         if self.current_key:
-            theory_text += f"当前调号: {self.get_key_name()}\n"
+            parts.append(f"当前调号: {self.get_key_name()}\n")
+        theory_text = "".join(parts)
         
-        self.update_music_theory.emit(theory_text)
+        # 文本变化时才交给界面帧定时器刷新
+        if theory_text != self.last_theory_text:
+            self.last_theory_text = theory_text
+            self.theory_frame = theory_text
     
     def analyze_single_note(self, note):
         """分析单个音符的乐理信息"""
@@ -1580,32 +2213,16 @@ class MidiPlayerApp(QMainWindow):
             
         interval_name = self.get_interval_name(interval)
         
-        # 大调音阶中的位置
-        major_positions = {}
-        major_scales = self.get_major_scales()
-        for key, scale in major_scales.items():
-            # 调整到当前八度
-            base_note = self.get_key_root_note(key)
-            base_note_in_octave = base_note % 12
-            note_in_octave = note_number % 12
-            
-            if note_in_octave in scale:
-                position = scale.index(note_in_octave) + 1
-                major_positions[key] = position
+        # 大调音阶中的位置（按音级查预计算表）
+        pitch_class = note_number % 12
+        major_positions = MAJOR_SCALE_DEGREES[pitch_class]
         
         # 构建文本
-        text = f"▶ 音符: {note_name}{octave}\n"
-        text += f"   频率: {frequency} Hz\n"
-        text += f"   力度: {note['velocity']} (0-127)\n"
-        text += f"   与C{c_octave}音程: {interval_name}\n\n"
-        
-        text += "在大调中的位置:\n"
-        # 只显示几个常见大调
-        common_keys = ['C', 'G', 'D', 'F', 'Bb', 'A', 'Eb']
-        for key in common_keys:
-            if key in major_positions:
-                degree_name = self.get_degree_name(major_positions[key])
-                text += f"   {key}大调: 第{major_positions[key]}级 ({degree_name})\n"
+        parts = [f"▶ 音符: {note_name}{octave}\n"
+                 f"   频率: {frequency} Hz\n"
+                 f"   力度: {note['velocity']} (0-127)\n"
+                 f"   与C{c_octave}音程: {interval_name}\n\n",
+                 MAJOR_POSITION_TEXT[pitch_class]]
         
         # 当前调式信息
         key_name = ""
@@ -1613,265 +2230,182 @@ class MidiPlayerApp(QMainWindow):
             key_name = self.get_key_name()
             position = major_positions[self.current_key[0].upper()]
             degree_name = self.get_degree_name(position)
-            text += f"\n当前调式 ({key_name}) 中: 第{position}级 ({degree_name})\n"
+            parts.append(f"\n当前调式 ({key_name}) 中: 第{position}级 ({degree_name})\n")
         
         # 音阶信息
         if self.current_key and key_name:
             scale_notes = self.get_scale_notes(self.current_key)
-            text += f"\n{key_name}音阶: {', '.join(scale_notes)}\n"
+            parts.append(f"\n{key_name}音阶: {', '.join(scale_notes)}\n")
         
-        return text
+        return "".join(parts)
     
     def analyze_chord(self, notes):
         """分析和弦的乐理信息"""
         # 提取音符（忽略八度差异）
-        note_classes = sorted(list(set([note['note'] % 12 for note in notes])))
-        note_names = [f"{note['name']}{note['octave']}" for note in notes]
+        note_classes = tuple(sorted({note['note'] % 12 for note in notes}))
+        # 音符列表最多显示5个
+        shown_names = ', '.join([f"{note['name']}{note['octave']}" for note in notes[:5]])
         
         # 识别和弦
         chord_name, chord_type, chord_notes = self.identify_chord(note_classes)
         
         # 构建文本
-        text = f"▶ 和弦: {chord_name} ({chord_type})\n"
-        text += f"   构成音: {', '.join(chord_notes)}\n"
-        text += f"   音符: {', '.join(note_names[:5])}{'...' if len(note_names) > 5 else ''}\n\n"
+        text = (f"▶ 和弦: {chord_name} ({chord_type})\n"
+                f"   构成音: {', '.join(chord_notes)}\n"
+                f"   音符: {shown_names}{'...' if len(notes) > 5 else ''}\n\n")
         
         # 和弦属性（基于当前调式推断）
-        chord_degree = ""
         if self.current_key:
-            key_name = self.get_key_name()
             chord_degree = self.get_chord_degree(chord_name, self.current_key)
             if chord_degree:
-                text += f"在{key_name}中: {chord_degree}\n\n"
+                text = f"{text}在{self.get_key_name()}中: {chord_degree}\n\n"
         
         return text
     
     def get_interval_name(self, interval):
         """获取音程名称"""
-        interval = interval % 12
-        interval_names = [
-            "纯一度", "小二度", "大二度", "小三度", "大三度",
-            "纯四度", "增四度/减五度", "纯五度", "小六度",
-            "大六度", "小七度", "大七度"
-        ]
-        return interval_names[interval]
+        return INTERVAL_NAMES[interval % 12]
     
     def get_degree_name(self, degree):
         """获取音阶度数名称"""
-        degree_names = [
-            "主音", "上主音", "中音", "下属音", 
-            "属音", "下中音", "导音"
-        ]
-        return degree_names[degree - 1] if 1 <= degree <= 7 else f"第{degree}级"
-    
-    def get_major_scales(self):
-        """获取各大调的音阶"""
-        return {
-            'C': [0, 2, 4, 5, 7, 9, 11],
-            'G': [0, 2, 4, 5, 7, 9, 10],
-            'D': [0, 2, 4, 6, 7, 9, 10],
-            'A': [0, 2, 4, 6, 7, 9, 11],
-            'E': [0, 1, 4, 6, 7, 9, 11],
-            'B': [0, 1, 4, 6, 7, 8, 11],
-            'F#': [0, 1, 3, 6, 7, 8, 11],
-            'Gb': [0, 1, 3, 6, 7, 8, 11],
-            'Db': [0, 1, 3, 5, 7, 8, 11],
-            'Ab': [0, 1, 3, 5, 7, 8, 10],
-            'Eb': [0, 2, 3, 5, 7, 9, 10],
-            'Bb': [0, 2, 3, 5, 7, 9, 11],
-            'F': [0, 2, 4, 5, 7, 8, 11]
-        }
+        return DEGREE_NAMES[degree - 1] if 1 <= degree <= 7 else f"第{degree}级"
     
     def get_key_root_note(self, key):
         """获取调号的根音MIDI编号"""
-        key_offsets = {
-            'C': 0, 'G': 7, 'D': 2, 'A': 9, 'E': 4, 'B': 11,
-            'F#': 6, 'Gb': 6, 'Db': 1, 'Ab': 8, 'Eb': 3, 'Bb': 10, 'F': 5
-        }
         if not key:
             return 60  # 默认C4
-        root = key[0].upper()
-        return 60 + key_offsets.get(root, 0)
+        return 60 + KEY_OFFSETS.get(key[0].upper(), 0)
     
     def get_scale_notes(self, key):
         """获取调式的音阶音符名称"""
-        note_names = ['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B']
         if not key:
             return []
-            
-        root_note = self.get_key_root_note(key) % 12
-        is_major = key.isupper() if len(key) == 1 else key[0].isupper()
-        
-        if is_major:
-            # 大调
-            intervals = [0, 2, 4, 5, 7, 9, 11]
-        else:
-            # 小调（自然小调）
-            intervals = [0, 2, 3, 5, 7, 8, 10]
-            
-        scale_notes = [(root_note + i) % 12 for i in intervals]
-        return [note_names[i] for i in scale_notes]
+        scale_notes = SCALE_NOTES.get(key[0])
+        if scale_notes is None:
+            scale_notes = build_scale_notes(key)
+        return list(scale_notes)
     
     def identify_chord(self, note_classes):
         """识别和弦类型"""
-        note_names = ['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B']
-        
-        # 简化为相对根音的半音数
-        root = note_classes[0]
-        relative_notes = [(n - root) % 12 for n in note_classes]
-        relative_notes_sorted = sorted(relative_notes)
-        
-        # 常见和弦类型的音程模式
-        chord_patterns = {
-            '大三和弦': ([0, 4, 7], 'Maj', '大三和弦'),
-            '小三和弦': ([0, 3, 7], 'm', '小三和弦'),
-            '增三和弦': ([0, 4, 8], 'aug', '增三和弦'),
-            '减三和弦': ([0, 3, 6], 'dim', '减三和弦'),
-            '七和弦': ([0, 4, 7, 10], '7', '属七和弦'),
-            '大七和弦': ([0, 4, 7, 11], 'Maj7', '大七和弦'),
-            '小七和弦': ([0, 3, 7, 10], 'm7', '小七和弦'),
-            '减七和弦': ([0, 3, 6, 9], 'dim7', '减七和弦'),
-            '半减七和弦': ([0, 3, 6, 10], 'm7b5', '半减七和弦'),
-            '六和弦': ([0, 4, 7, 9], '6', '六和弦'),
-            '九和弦': ([0, 4, 7, 10, 2], '9', '九和弦')
-        }
-        
-        # 匹配和弦模式
-        for name, (pattern, symbol, desc) in chord_patterns.items():
-            if self.match_chord_pattern(relative_notes_sorted, pattern):
-                root_name = note_names[root]
-                chord_notes = [note_names[(root + i) % 12] for i in pattern]
-                return f"{root_name}{symbol}", desc, chord_notes
-        
-        # 如果没有匹配到已知和弦，返回基本信息
-        root_name = note_names[root]
-        chord_notes = [note_names[n] for n in note_classes]
-        return f"{root_name}和弦", f"由{len(note_classes)}个音符组成", chord_notes
-    
-    def match_chord_pattern(self, notes, pattern):
-        """匹配和弦音程模式"""
-        # 如果音符数量少于和弦模式，不匹配
-        if len(notes) < len(pattern):
-            return False
-            
-        # 检查模式中的所有音程是否都在音符中
-        for p in pattern:
-            if p not in notes:
-                return False
-        return True
+        return identify_chord_classes(tuple(note_classes))
     
     def get_chord_degree(self, chord_name, key):
         """获取和弦在当前调式中的级数"""
         if not key:
             return None
-            
-        # 提取和弦根音
-        root = chord_name[0]
-        if len(chord_name) > 1 and chord_name[1] in ['#', 'b']:
-            root += chord_name[1]
-        
-        # 大调中的和弦级数
-        major_chords = {
-            'C': ['C', 'Dm', 'Em', 'F', 'G', 'Am', 'Bdim'],
-            'G': ['G', 'Am', 'Bm', 'C', 'D', 'Em', 'F#dim'],
-            'D': ['D', 'Em', 'F#m', 'G', 'A', 'Bm', 'C#dim'],
-            'A': ['A', 'Bm', 'C#m', 'D', 'E', 'F#m', 'G#dim'],
-            'E': ['E', 'F#m', 'G#m', 'A', 'B', 'C#m', 'D#dim'],
-            'B': ['B', 'C#m', 'D#m', 'E', 'F#', 'G#m', 'A#dim'],
-            'F#': ['F#', 'G#m', 'A#m', 'B', 'C#', 'D#m', 'Edim'],
-            'Gb': ['Gb', 'Abm', 'Bbm', 'Cb', 'Db', 'Ebm', 'Fdim'],
-            'Db': ['Db', 'Ebm', 'Fm', 'Gb', 'Ab', 'Bbm', 'Cdim'],
-            'Ab': ['Ab', 'Bbm', 'Cm', 'Db', 'Eb', 'Fm', 'Gdim'],
-            'Eb': ['Eb', 'Fm', 'Gm', 'Ab', 'Bb', 'Cm', 'Ddim'],
-            'Bb': ['Bb', 'Cm', 'Dm', 'Eb', 'F', 'Gm', 'Adim'],
-            'F': ['F', 'Gm', 'Am', 'Bb', 'C', 'Dm', 'Edim']
-        }
-        
-        key_root = key[0].upper()
-        if key_root in major_chords:
-            chords = major_chords[key_root]
-            for i, chord in enumerate(chords):
-                if chord.startswith(root):
-                    degrees = ["主和弦", "上主和弦", "中音和弦", "下属和弦", 
-                               "属和弦", "下中音和弦", "导音和弦"]
-                    return f"{i+1}级 {degrees[i]}"
-        
-        return "未知级数"
+        return chord_degree_in_key(chord_name, key)
     
     def format_time(self, seconds):
         """格式化时间为MM:SS"""
+        if 0 <= seconds < 3600:
+            return TIME_TEXT[int(seconds)]
         minutes = int(seconds // 60)
         seconds = int(seconds % 60)
         return f"{minutes:02d}:{seconds:02d}"
     
     def update_performance_data(self):
-        """更新性能数据"""
+        """收集进度、活跃音符、性能数据和FPS，合并为一帧发送"""
         try:
-            if self.start_time and self.is_playing and not self.playback_complete:
-                elapsed = time.time() - self.start_time
-                throughput = self.message_count / elapsed if elapsed > 0 else 0
-                
-                # 计算平均延迟
-                if self.queue_lengths:
-                    self.average_latency = sum(self.queue_lengths) / len(self.queue_lengths)
-                else:
-                    self.average_latency = 0
-                
-                performance_data = {
-                    'message_count': self.message_count,
-                    'session_message_count': self.session_message_count,
-                    'throughput': round(throughput, 1),
-                    'latency': round(self.average_latency, 2),
-                    'active_notes': len(self.active_notes),
-                    'queue_size': self.midi_event_queue.qsize(),
-                    'active_ports': sum([self.port1_connected, self.port2_connected])
-                }
-                
-                self.update_performance.emit(performance_data)
+            frame = {}
+            
+            # 播放进度
+            if self.is_playing and self.total_time > 0:
+                progress = int((self.current_time / self.total_time) * 1000)
+                time_text = f"{self.format_time(self.current_time)} / {self.format_time(self.total_time)}"
+                # 进度值和时间文本都没变化时不刷新进度条
+                if (progress, time_text) != self.last_progress_frame:
+                    self.last_progress_frame = (progress, time_text)
+                    frame['progress'] = (progress, 1000, time_text)
+            
+            # 活跃音符快照
+            notes = self.active_notes_frame
+            if notes is not None:
+                self.active_notes_frame = None
+                frame['notes'] = notes
+            
+            # 乐理文本
+            theory = self.theory_frame
+            if theory is not None:
+                self.theory_frame = None
+                frame['theory'] = theory
+            
+            # FPS
+            if self.pending_fps is not None:
+                frame['fps'] = self.pending_fps
+                self.pending_fps = None
+            
+            # 先快照工作线程写入的数据，再统一计算
+            latency_count = sum(self.latency_counts)
+            if latency_count:
+                self.average_latency = sum(self.latency_sums) / latency_count
+                self.peak_latency = max(self.latency_peaks)
             else:
-                # 不播放时也更新部分性能数据
-                performance_data = {
-                    'message_count': self.message_count,
-                    'session_message_count': self.session_message_count,
-                    'throughput': 0,
-                    'latency': round(self.average_latency, 2) if self.queue_lengths else 0,
-                    'active_notes': len(self.active_notes),
-                    'queue_size': self.midi_event_queue.qsize(),
-                    'active_ports': sum([self.port1_connected, self.port2_connected])
-                }
-                self.update_performance.emit(performance_data)
+                self.average_latency = 0
+                self.peak_latency = 0
+            
+            # 会话计数只汇总一次，当前歌曲计数由它减去基数得到
+            session_count = self.session_message_count()
+            message_count = session_count - self.message_count_base
+            throughput = 0
+            if self.start_time and self.is_playing and not self.playback_complete:
+                elapsed = (time.perf_counter_ns() - self.start_time) / 1e9
+                throughput = message_count / elapsed if elapsed > 0 else 0
+            
+            values = (message_count, session_count, round(throughput, 1),
+                      round(self.average_latency, 2), self.note_active.count(1),
+                      self.midi_events_pending(), len(self.port_senders))
+            
+            # 性能数据未变化时不重复刷新界面
+            if values != self.last_performance_values:
+                self.last_performance_values = values
+                performance_data = self.performance_payload
+                for field, value in zip(PERFORMANCE_FIELDS, values):
+                    performance_data[field] = value
+                frame['perf'] = performance_data
+            
+            if frame:
+                self.update_frame.emit(frame)
         except Exception as e:
             self.log(f"性能数据更新错误: {str(e)}", "error", is_fatal=False)
     
     def update_realtime_display(self):
         """更新实时显示"""
         try:
-            # 确保属性存在
-            if not hasattr(self, 'last_display_update'):
-                self.last_display_update = time.time()
-            if not hasattr(self, 'last_display_count'):
-                self.last_display_count = 0
-                
-            with self.counter_lock:
-                current_count = self.message_count
+            current_count = self.session_message_count()
                 
             # 计算实时吞吐量
-            current_time = time.time()
-            elapsed = current_time - self.last_display_update
+            current_time = time.perf_counter_ns()
+            elapsed = (current_time - self.last_display_update) / 1e9
             
             if elapsed > 0:
                 diff = current_count - self.last_display_count
                 throughput = diff / elapsed
                 
                 # 更新实时信息
-                memory_usage = psutil.Process().memory_info().rss / (1024 * 1024)
+                self.system_sample_tick += 1
+                if self.system_sample_tick >= 10:
+                    self.system_sample_tick = 0
+                    self.cpu_usage = self.process.cpu_percent(None)
+                    self.memory_usage = self.process.memory_info().rss / (1024 * 1024)
                 
                 display_text = (f"吞吐量: {throughput:.0f} ev/s | "
-                               f"延迟: {self.average_latency:.1f} ms")
+                               f"延迟: {self.average_latency:.1f} ms (峰值 {self.peak_latency:.1f}) | "
+                               f"CPU: {self.cpu_usage:.0f}% | 内存: {self.memory_usage:.0f} MB")
                 self.performance_info.setText(display_text)
                 
                 self.last_display_count = current_count
                 self.last_display_update = current_time
+            
+            # 只发送上次刷新之后新增的历史记录
+            pending = self.history_pending
+            if pending:
+                records = []
+                try:
+                    while True:
+                        records.append(pending.popleft())
+                except IndexError:
+                    pass
+                self.append_note_history.emit(records)
                 
         except Exception as e:
             if self.debug_mode:
@@ -1880,12 +2414,12 @@ class MidiPlayerApp(QMainWindow):
     def update_fps_counter(self):
         """更新FPS计数器"""
         try:
-            current_time = time.time()
-            elapsed = current_time - self.fps_last_time
+            current_time = time.perf_counter_ns()
+            elapsed = (current_time - self.fps_last_time) / 1e9
             
             if elapsed > 0:
                 fps = self.fps_counter / elapsed
-                self.update_fps.emit(int(fps))
+                self.pending_fps = int(fps)
             
             self.fps_counter = 0
             self.fps_last_time = current_time
@@ -1895,60 +2429,107 @@ class MidiPlayerApp(QMainWindow):
     def show_float_notes_window(self):
         """显示浮动音符窗口"""
         try:
-            self.float_window = FloatNotesWindow(self)
+            # 复用已创建的窗口，避免每次打开都新建窗口和信号连接
+            if not hasattr(self, 'float_window'):
+                self.float_window = FloatNotesWindow(self)
             self.float_window.show()
+            self.float_window.raise_()
         except Exception as e:
             self.log(f"显示浮动窗口错误: {str(e)}", "error", is_fatal=False)
     
+    def update_log_filter(self):
+        """根据勾选框重新计算日志过滤掩码"""
+        self.log_mask = ((self.debug_check.isChecked() and LOG_LEVEL_BITS['debug']) |
+                         (self.info_check.isChecked() and LOG_LEVEL_BITS['info']) |
+                         (self.warning_check.isChecked() and LOG_LEVEL_BITS['warning']) |
+                         (self.error_check.isChecked() and LOG_LEVEL_BITS['error']))
+        self.ignore_non_fatal = self.ignore_non_fatal_check.isChecked()
+    
     def log(self, message, level='info', is_fatal=True):
         """记录日志"""
+        # 未勾选的级别直接丢弃，不做格式化
+        if not (self.log_mask & LOG_LEVEL_BITS.get(level, 0)):
+            return
         # 如果是非致命错误且用户选择忽略，则不记录
-        if level == 'error' and not is_fatal and hasattr(self, 'ignore_non_fatal_check') and self.ignore_non_fatal_check.isChecked():
+        if level == 'error' and not is_fatal and self.ignore_non_fatal:
             return
-            
-        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        
+        timestamp = time.strftime('%Y-%m-%d %H:%M:%S')
         log_entry = f"[{timestamp}] [{level.upper()}] {message}"
-        self.update_log.emit(log_entry, level)
+        self.log_ring.append((log_entry, level))
     
     @pyqtSlot(str, str)
-    def on_status_updated(self, status_text, color):
+    def on_status_updated(self, status_text, status):
         """状态更新槽函数"""
         try:
             self.playback_status.setText(f"状态: {status_text}")
-            self.playback_status.setStyleSheet(f"color: {color}; font-weight: bold; font-size: 11pt;")
+            self.set_status_style(self.playback_status, status)
             self.fps_counter += 1
         except Exception as e:
             self.log(f"状态更新错误: {str(e)}", "error", is_fatal=False)
     
-    @pyqtSlot(int, int, str)
+    @pyqtSlot(dict)
+    def on_frame_updated(self, frame):
+        """界面帧更新槽函数，分发到各区域"""
+        if 'progress' in frame:
+            self.on_progress_updated(*frame['progress'])
+        if 'notes' in frame:
+            self.on_active_notes_updated(frame['notes'])
+        if 'perf' in frame:
+            self.on_performance_updated(frame['perf'])
+        if 'theory' in frame:
+            self.on_music_theory_updated(frame['theory'])
+        if 'fps' in frame:
+            self.on_fps_updated(frame['fps'])
+    
     def on_progress_updated(self, value, maximum, time_text):
         """进度更新槽函数"""
         try:
             self.progress_bar.setValue(value)
-            self.time_label.setText(time_text)
+            if self.progress_bar.format() != time_text:
+                self.progress_bar.setFormat(time_text)
             self.fps_counter += 1
         except Exception as e:
             self.log(f"进度更新错误: {str(e)}", "error", is_fatal=False)
     
+    def hide_active_note_rows(self, keep_rows):
+        """隐藏不在keep_rows中的活跃音符行"""
+        for row in self.visible_note_rows - keep_rows:
+            self.active_notes_table.setRowHidden(row, True)
+        self.visible_note_rows = keep_rows
+    
     @pyqtSlot(list)
     def on_active_notes_updated(self, notes):
         """活跃音符更新槽函数"""
         try:
             if not self.show_active_notes:
-                self.active_notes_table.setRowCount(0)
+                self.hide_active_note_rows(set())
                 return
-                
-            self.active_notes_table.setRowCount(0)
             
+            # 批量更新期间暂停重绘
+            table = self.active_notes_table
+            table.setUpdatesEnabled(False)
+            
+            rows = set()
             for note_data in notes:
-                row_position = self.active_notes_table.rowCount()
-                self.active_notes_table.insertRow(row_position)
+                row = note_data['note']
+                rows.add(row)
+                texts = (note_data['name'], str(note_data['octave']), f"{note_data['frequency']} Hz",
+                         str(note_data['velocity']), f"{note_data['duration']} s")
+                
+                # 只修改变化的单元格
+                cells = self.active_note_cells[row]
+                old_texts = self.active_note_texts[row]
+                for col in range(5):
+                    if old_texts[col] != texts[col]:
+                        old_texts[col] = texts[col]
+                        cells[col].setText(texts[col])
                 
-                self.active_notes_table.setItem(row_position, 0, QTableWidgetItem(note_data['name']))
-                self.active_notes_table.setItem(row_position, 1, QTableWidgetItem(str(note_data['octave'])))
-                self.active_notes_table.setItem(row_position, 2, QTableWidgetItem(f"{note_data['frequency']} Hz"))
-                self.active_notes_table.setItem(row_position, 3, QTableWidgetItem(str(note_data['velocity'])))
-                self.active_notes_table.setItem(row_position, 4, QTableWidgetItem(f"{note_data['duration']} s"))
+                if row not in self.visible_note_rows:
+                    table.setRowHidden(row, False)
+            
+            self.hide_active_note_rows(rows)
+            table.setUpdatesEnabled(True)
             
             # 更新浮动窗口（如果存在）
             if hasattr(self, 'float_window') and self.float_window.isVisible():
@@ -1956,9 +2537,9 @@ class MidiPlayerApp(QMainWindow):
                 
             self.fps_counter += 1
         except Exception as e:
+            self.active_notes_table.setUpdatesEnabled(True)
             self.log(f"活跃音符更新错误: {str(e)}", "error", is_fatal=False)
     
-    @pyqtSlot(dict)
     def on_performance_updated(self, data):
         """性能数据更新槽函数"""
         try:
@@ -1974,50 +2555,50 @@ class MidiPlayerApp(QMainWindow):
             self.log(f"性能数据显示错误: {str(e)}", "error", is_fatal=False)
     
     @pyqtSlot(list)
-    def on_note_history_updated(self, history):
-        """音符历史更新槽函数"""
+    def on_note_history_appended(self, records):
+        """音符历史增量更新槽函数（新记录插入顶部）"""
         try:
-            self.note_history_list.clear()
-            
-            for item in history:
+            history_list = self.note_history_list
+            for item in records:
                 if item['type'] == 'ON':
                     text = f"{item['time']} - {item['name']}{item['octave']} (ON, Vel: {item['velocity']})"
                 else:
                     text = f"{item['time']} - {item['name']}{item['octave']} (OFF, Dur: {item['duration']}s)"
                 
-                list_item = QListWidgetItem(text)
-                self.note_history_list.addItem(list_item)
+                history_list.insertItem(0, QListWidgetItem(text))
+            
+            # 与note_history保持相同的条数上限
+            limit = self.note_history.maxlen
+            while history_list.count() > limit:
+                history_list.takeItem(history_list.count() - 1)
             
             self.fps_counter += 1
         except Exception as e:
             self.log(f"音符历史更新错误: {str(e)}", "error", is_fatal=False)
     
-    @pyqtSlot(str, str)
-    def on_log_updated(self, message, level):
-        """日志更新槽函数"""
+    def drain_log(self):
+        """批量取出日志缓冲区并显示"""
         try:
-            # 根据级别设置颜色
-            color_codes = {
-                'debug': '#888888',
-                'info': '#61c0bf',
-                'warning': '#ffc107',
-                'error': '#dc3545'
-            }
+            if not self.log_ring:
+                return
+            
+            # 连续相同级别的日志合并为一次追加（入队后才取消勾选的级别在此丢弃）
+            runs = []
+            log_mask = self.log_mask
+            log_ring = self.log_ring
+            while log_ring:
+                message, level = log_ring.popleft()
+                if not (log_mask & LOG_LEVEL_BITS.get(level, 0)):
+                    continue
+                if runs and runs[-1][0] == level:
+                    runs[-1][1].append(message)
+                else:
+                    runs.append((level, [message]))
             
-            # 检查是否需要显示
-            show = False
-            if level == 'debug' and self.debug_check.isChecked():
-                show = True
-            elif level == 'info' and self.info_check.isChecked():
-                show = True
-            elif level == 'warning' and self.warning_check.isChecked():
-                show = True
-            elif level == 'error' and self.error_check.isChecked():
-                show = True
-            
-            if show:
-                self.log_text.setTextColor(QColor(color_codes.get(level, '#ffffff')))
-                self.log_text.append(message)
+            if runs:
+                for level, messages in runs:
+                    self.log_text.setTextColor(self.log_colors.get(level, self.default_log_color))
+                    self.log_text.append('\n'.join(messages))
                 # 移动到末尾
                 cursor = self.log_text.textCursor()
                 cursor.movePosition(cursor.MoveOperation.End)
@@ -2035,20 +2616,20 @@ class MidiPlayerApp(QMainWindow):
             if port_num == 1:
                 if connected:
                     self.port1_status.setText("已连接")
-                    self.port1_status.setStyleSheet("color: #28a745; font-weight: bold;")
+                    self.set_status_style(self.port1_status, "ok")
                     self.port1_btn.setText("断开")
                 else:
                     self.port1_status.setText("未连接")
-                    self.port1_status.setStyleSheet("color: #dc3545; font-weight: bold;")
+                    self.set_status_style(self.port1_status, "error")
                     self.port1_btn.setText("连接")
             else:
                 if connected:
                     self.port2_status.setText("已连接")
-                    self.port2_status.setStyleSheet("color: #28a745; font-weight: bold;")
+                    self.set_status_style(self.port2_status, "ok")
                     self.port2_btn.setText("断开")
                 else:
                     self.port2_status.setText("未连接")
-                    self.port2_status.setStyleSheet("color: #dc3545; font-weight: bold;")
+                    self.set_status_style(self.port2_status, "error")
                     self.port2_btn.setText("连接")
             
             self.fps_counter += 1
@@ -2060,14 +2641,13 @@ class MidiPlayerApp(QMainWindow):
         """文件列表更新槽函数"""
         try:
             self.file_list.clear()
-            for file_path in file_list:
-                self.file_list.addItem(os.path.basename(file_path))
+            for file_path, file_name in file_list:
+                self.file_list.addItem(file_name)
             
             self.fps_counter += 1
         except Exception as e:
             self.log(f"文件列表更新错误: {str(e)}", "error", is_fatal=False)
     
-    @pyqtSlot(int)
     def on_fps_updated(self, fps):
         """FPS更新槽函数"""
         try:
@@ -2096,6 +2676,10 @@ class MidiPlayerApp(QMainWindow):
         # 设置停止事件
         self.stop_event.set()
         
+        # 关闭解析进程池
+        if self.parse_pool is not None:
+            self.parse_pool.shutdown(wait=False, cancel_futures=True)
+        
         # 等待线程结束
         time.sleep(0.1)
         
@@ -2174,6 +2758,8 @@ class FloatNotesWindow(QMainWindow):
         self.notes_table.setHorizontalHeaderLabels(["音符", "八度", "频率", "力度", "时长"])
         self.notes_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
         layout.addWidget(self.notes_table)
+        # 每行当前显示的文本，更新时只修改变化的单元格
+        self.row_texts = []
         
         # 提示信息
         hint_label = QLabel("提示：可通过标题栏拖动窗口，支持大小调整")
@@ -2185,35 +2771,39 @@ class FloatNotesWindow(QMainWindow):
             parent.update_active_notes.connect(self.update_notes)
     
     def update_notes(self, notes):
-        """更新音符显示"""
+        """更新音符显示（按行比较，只修改变化的单元格）"""
+        table = self.notes_table
         try:
-            self.notes_table.setRowCount(0)
-            
-            for note_data in notes:
-                row_position = self.notes_table.rowCount()
-                self.notes_table.insertRow(row_position)
-                
-                # 所有文字都是白色，与暗色主题协调
-                item_note = QTableWidgetItem(note_data['name'])
-                item_note.setForeground(QColor("#ffffff"))
-                self.notes_table.setItem(row_position, 0, item_note)
-                
-                item_octave = QTableWidgetItem(str(note_data['octave']))
-                item_octave.setForeground(QColor("#ffffff"))
-                self.notes_table.setItem(row_position, 1, item_octave)
-                
-                item_freq = QTableWidgetItem(f"{note_data['frequency']} Hz")
-                item_freq.setForeground(QColor("#ffffff"))
-                self.notes_table.setItem(row_position, 2, item_freq)
-                
-                item_vel = QTableWidgetItem(str(note_data['velocity']))
-                item_vel.setForeground(QColor("#ffffff"))
-                self.notes_table.setItem(row_position, 3, item_vel)
+            table.setUpdatesEnabled(False)
+            row_texts = self.row_texts
+            
+            # 行数变化时只增删末尾的行
+            if len(notes) != len(row_texts):
+                table.setRowCount(len(notes))
+                del row_texts[len(notes):]
+            
+            for row, note_data in enumerate(notes):
+                texts = (note_data['name'], str(note_data['octave']), f"{note_data['frequency']} Hz",
+                         str(note_data['velocity']), f"{note_data['duration']} s")
+                if row == len(row_texts):
+                    # 新增行：所有文字都是白色，与暗色主题协调
+                    for col in range(5):
+                        item = QTableWidgetItem(texts[col])
+                        item.setForeground(QColor("#ffffff"))
+                        table.setItem(row, col, item)
+                    row_texts.append(texts)
+                    continue
                 
-                item_dur = QTableWidgetItem(f"{note_data['duration']} s")
-                item_dur.setForeground(QColor("#ffffff"))
-                self.notes_table.setItem(row_position, 4, item_dur)
+                old_texts = row_texts[row]
+                if old_texts != texts:
+                    for col in range(5):
+                        if old_texts[col] != texts[col]:
+                            table.item(row, col).setText(texts[col])
+                    row_texts[row] = texts
+            
+            table.setUpdatesEnabled(True)
         except Exception as e:
+            table.setUpdatesEnabled(True)
             print(f"浮动窗口更新错误: {str(e)}")
     
     def closeEvent(self, event):
@@ -1,9 +1,13 @@
 import sys
 import os
+import re
 import time
 import queue
 import threading
+from array import array
+from bisect import bisect_left, insort
 from collections import deque
+from functools import lru_cache
 
 import mido
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
@@ -12,7 +16,241 @@ from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QH
                              QGroupBox, QFileDialog, QMessageBox, QHeaderView, QCheckBox,
                              QToolButton)
 from PyQt6.QtCore import (Qt, pyqtSignal, pyqtSlot, QTimer)
-from PyQt6.QtGui import (QColor, QIcon, QTextCursor)
+from PyQt6.QtGui import (QColor, QIcon, QTextCursor, QTextCharFormat)
+
+# 界面共用的样式表字符串，相同样式只保留一份
+TITLE_STYLE = "font-size: 11pt; font-weight: bold;"
+LABEL_STYLE = "font-size: 10pt; font-weight: bold;"
+TEXT_STYLE = "font-size: 10pt;"
+BUTTON_STYLE = "font-size: 10pt; padding: 4px;"
+MAIN_BUTTON_STYLE = "font-size: 11pt; padding: 4px;"
+PORT_OFFLINE_STYLE = "font-size: 9pt; color: red; font-weight: bold;"
+PORT_ONLINE_STYLE = "font-size: 9pt; color: green; font-weight: bold;"
+STATUS_STYLE = "font-size: 11pt; font-weight: bold; color: #{:06x};"
+
+# 状态栏颜色（0xRRGGBB），随update_status信号以整数传递
+STATUS_OK = 0x00FF00
+STATUS_ERROR = 0xFF0000
+STATUS_PAUSED = 0xFFA500
+STATUS_IDLE = 0xA4B5D5  # 与colors['accent2']相同
+
+# 自动选择时优先使用的虚拟MIDI端口
+VIRTUAL_PORT_PATTERN = re.compile(r"Virtual|LoopMIDI", re.IGNORECASE)
+
+# 全部16个通道的"所有音符关闭"(CC123)消息，只在导入时创建一次
+ALL_NOTES_OFF_MESSAGES = tuple(mido.Message('control_change', channel=channel, control=123, value=0)
+                               for channel in range(16))
+
+# 最多保留几首文件的解析结果（当前播放的和最近播放过的），黑乐谱解析结果可达数百MB
+PARSED_CACHE_SIZE = 2
+
+# 端口发送队列积压到这么多条后丢弃新的note_on（note_off等仍入队，避免挂音）；
+# 超过硬上限（端口长时间卡住）时send的所有新消息都丢弃，send_many发送的所有音符关闭消息不受限制
+SENDER_QUEUE_LIMIT = 8192
+SENDER_QUEUE_HARD_LIMIT = SENDER_QUEUE_LIMIT * 4
+
+# 平均延迟只统计每个端口最近这么多次发送，反映当前状况而非开播以来的累计
+LATENCY_WINDOW = 256
+
+# 需要交给音符线程处理的消息类型（两者都带note/velocity属性）
+NOTE_MESSAGE_TYPES = frozenset(('note_on', 'note_off'))
+
+# 测试信号：(开启消息, 关闭消息, 和弦名)，消息只在导入时创建一次
+TEST_CHORDS = tuple(
+    (tuple(mido.Message('note_on', note=note, velocity=64) for note in chord_notes),
+     tuple(mido.Message('note_off', note=note, velocity=64) for note in chord_notes),
+     chord_name)
+    for chord_notes, chord_name in (((60, 64, 67), "C大三和弦"), ((60, 63, 67), "C小三和弦"))
+)
+
+# 和弦识别表：根音归一化后的音程结构 -> (中文名, 英文后缀)
+CHORD_PATTERNS = {
+    (0, 4, 7, 11): ('大七和弦', 'Maj7'),
+    (0, 4, 7, 10): ('属七和弦', '7'),
+    (0, 3, 7, 10): ('小七和弦', 'm7'),
+    (0, 3, 6, 10): ('半减七和弦', 'm7b5'),
+    (0, 3, 6, 9): ('减七和弦', 'dim7'),
+    (0, 3, 7, 11): ('小大七和弦', 'mMaj7'),
+    
+    (0, 4, 7): ('大三和弦', 'Maj'),
+    (0, 3, 7): ('小三和弦', 'm'),
+    (0, 3, 6): ('减三和弦', 'dim'),
+    (0, 4, 8): ('增三和弦', 'aug'),
+    
+    (0, 5, 7): ('挂四和弦', 'sus4'),
+    (0, 2, 7): ('挂二和弦', 'sus2'),
+    
+    (0, 4, 7, 9): ('加九和弦', 'add9'),
+    (0, 3, 7, 9): ('小加九和弦', 'madd9'),
+    (0, 4, 7, 6): ('加六和弦', 'add6'),
+}
+
+# 12位音级集合（第i位表示与最低音级相差i个半音）-> 和弦名，由CHORD_PATTERNS生成；
+# 识别时音程按升序排列，未按升序书写的条目原本就匹配不到，这里同样跳过
+CHORD_BITMASKS = {
+    sum(1 << interval for interval in pattern): names
+    for pattern, names in CHORD_PATTERNS.items()
+    if list(pattern) == sorted(pattern)
+}
+
+# 按音名集合匹配的常见三和弦
+CHORD_LETTER_PATTERNS = {
+    frozenset({'C', 'E', 'G'}): 'C大三和弦',
+    frozenset({'C', 'Eb', 'G'}): 'C小三和弦',
+    frozenset({'C', 'Eb', 'Gb'}): 'C减三和弦',
+    frozenset({'C', 'E', 'G#'}): 'C增三和弦',
+    
+    frozenset({'G', 'B', 'D'}): 'G大三和弦',
+    frozenset({'G', 'Bb', 'D'}): 'G小三和弦',
+    frozenset({'G', 'Bb', 'Db'}): 'G减三和弦',
+    frozenset({'G', 'B', 'D#'}): 'G增三和弦',
+    
+    frozenset({'D', 'F#', 'A'}): 'D大三和弦',
+    frozenset({'D', 'F', 'A'}): 'D小三和弦',
+    frozenset({'D', 'F', 'Ab'}): 'D减三和弦',
+    frozenset({'D', 'F#', 'A#'}): 'D增三和弦',
+}
+
+NOTE_NAMES = ('C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B')
+
+# 128个MIDI音符的信息表，导入时一次生成，按音符号直接索引（音名序号即 note % 12）
+NOTE_LETTER = tuple(NOTE_NAMES[m % 12] for m in range(128))
+NOTE_OCTAVE = array('b', (m // 12 - 1 for m in range(128)))
+NOTE_NAME = tuple(f"{NOTE_LETTER[m]}{NOTE_OCTAVE[m]}" for m in range(128))
+NOTE_FREQUENCY = array('d', (440.0 * 2.0 ** ((m - 69) / 12.0) for m in range(128)))
+
+# 复音表中不随时间变化的显示文本，同样按音符号/力度值索引
+NOTE_OCTAVE_TEXT = tuple(str(octave) for octave in NOTE_OCTAVE)
+NOTE_FREQUENCY_TEXT = tuple(f"{frequency:.0f}" for frequency in NOTE_FREQUENCY)
+VELOCITY_TEXT = tuple(str(velocity) for velocity in range(128))
+
+# 音符号 -> 其音级在12位集合中的位
+NOTE_PITCH_BIT = tuple(1 << (m % 12) for m in range(128))
+
+def drain_queue(q):
+    """在一次加锁内清空queue.Queue，丢弃的任务同时从未完成计数中扣除"""
+    with q.mutex:
+        q.unfinished_tasks -= len(q.queue)
+        q.queue.clear()
+        if q.unfinished_tasks == 0:
+            q.all_tasks_done.notify_all()
+        q.not_full.notify_all()
+
+@lru_cache(maxsize=256)
+def clock_second_text(second):
+    """整数秒 -> 本地时间"HH:MM:SS"文本，同一秒内的多条记录只格式化一次"""
+    return time.strftime("%H:%M:%S", time.localtime(second))
+
+def format_clock_time(timestamp):
+    """time.time()时间戳 -> 本地时间"HH:MM:SS.mmm"文本"""
+    second = int(timestamp)
+    return f"{clock_second_text(second)}.{int((timestamp - second) * 1000):03d}"
+
+def set_text_if_changed(widget, text):
+    """文本变化时才调用setText，避免重复布局和重绘"""
+    if widget.text() != text:
+        widget.setText(text)
+
+def fill_table_rows(table, rows):
+    """按行数据填充表格：一次设好行数并复用已有单元格，填充期间屏蔽信号、排序和重绘"""
+    sorting = table.isSortingEnabled()
+    table.setUpdatesEnabled(False)
+    table.blockSignals(True)
+    table.setSortingEnabled(False)
+    try:
+        table.setRowCount(len(rows))
+        for row_idx, row_data in enumerate(rows):
+            for col_idx, value in enumerate(row_data.values()):
+                item = table.item(row_idx, col_idx)
+                if item is None:
+                    item = QTableWidgetItem(value)
+                    item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
+                    table.setItem(row_idx, col_idx, item)
+                elif item.text() != value:
+                    item.setText(value)
+    finally:
+        table.setSortingEnabled(sorting)
+        table.blockSignals(False)
+        table.setUpdatesEnabled(True)
+
+class PortSender:
+    """单个输出端口的发送线程：播放线程只把消息放入队列，由本线程调用port.send，慢端口不会拖住其他端口和播放调度"""
+    def __init__(self, port, log_message):
+        self.port = port
+        self.name = port.name
+        self.log_message = log_message
+        # 播放线程和界面线程（测试信号、所有音符关闭）都会写入，依赖deque的append/popleft线程安全，无需加锁；
+        # 不设maxlen，满时由send决定丢弃哪些消息，避免自动挤掉最旧的note_off
+        self.queue = deque()
+        self.ready = threading.Event()
+        self.running = True
+        self.dropped_count = 0  # 累计丢弃的消息数
+        self.overflowing = False  # 正在丢弃消息，队列清空后恢复并记录本次丢弃数
+        self.overflow_dropped_base = 0
+        self.latency_samples = deque(maxlen=LATENCY_WINDOW)  # 最近若干次port.send耗时（纳秒）
+        self.thread = threading.Thread(target=self.run, daemon=True, name=f"PortSender-{self.name}")
+        self.thread.start()
+
+    def send(self, msg):
+        backlog = len(self.queue)
+        if backlog >= SENDER_QUEUE_LIMIT and (
+                backlog >= SENDER_QUEUE_HARD_LIMIT or (msg.type == 'note_on' and msg.velocity > 0)):
+            self.drop_message()
+            return
+        self.queue.append(msg)
+        self.ready.set()
+
+    def drop_message(self):
+        """记录一条因队列积压而丢弃的消息，每次积压只在开始和恢复时各记一条日志"""
+        self.dropped_count += 1
+        if not self.overflowing:
+            self.overflowing = True
+            self.overflow_dropped_base = self.dropped_count - 1
+            self.log_message("端口%s发送积压超过%d条，开始丢弃新的音符", "WARN", self.name, SENDER_QUEUE_LIMIT)
+
+    def send_many(self, msgs):
+        """一批消息一次入队，只唤醒发送线程一次"""
+        self.queue.extend(msgs)
+        self.ready.set()
+
+    def clear(self):
+        self.queue.clear()
+
+    def reset_stats(self):
+        self.latency_samples.clear()
+
+    def run(self):
+        port = self.port
+        pending = self.queue
+        while self.running:
+            self.ready.wait()
+            self.ready.clear()
+            while pending:
+                try:
+                    msg = pending.popleft()
+                except IndexError:
+                    break
+                send_start = time.perf_counter_ns()
+                try:
+                    port.send(msg)
+                except Exception as e:
+                    self.log_message("端口%s发送失败: %s", "ERROR", self.name, e)
+                    continue
+                self.latency_samples.append(time.perf_counter_ns() - send_start)
+            if self.overflowing and not pending:
+                self.overflowing = False
+                self.log_message("端口%s发送积压已清空，期间丢弃%d条消息", "WARN", self.name,
+                                 self.dropped_count - self.overflow_dropped_base)
+
+    def stop(self):
+        """通知线程发完已排队的消息后退出，不等待"""
+        self.running = False
+        self.ready.set()
+
+    def close(self, timeout=0.5):
+        """发完已排队的消息后停止线程，调用方随后再关闭端口"""
+        self.stop()
+        self.thread.join(timeout=timeout)
 
 class FloatingHarmonyWindow(QMainWindow):
     """浮动复音信息窗口"""
@@ -63,13 +301,8 @@ class FloatingHarmonyWindow(QMainWindow):
     
     def update_table(self, data):
         """更新表格数据"""
-        self.harmony_table.setRowCount(0)
-        for row_idx, row_data in enumerate(data):
-            self.harmony_table.insertRow(row_idx)
-            for col_idx, (key, value) in enumerate(row_data.items()):
-                item = QTableWidgetItem(value)
-                item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-                self.harmony_table.setItem(row_idx, col_idx, item)
+        if self.isVisible():
+            fill_table_rows(self.harmony_table, data)
     
     def clear_table(self):
         """清空表格"""
@@ -82,14 +315,13 @@ class FloatingHarmonyWindow(QMainWindow):
 
 class MIDIVirtualPlayer(QMainWindow):
     # 信号定义
-    update_status = pyqtSignal(str, QColor)
+    update_status = pyqtSignal(str, int)
     update_harmony_table = pyqtSignal(list)
     update_theory_text = pyqtSignal(str)
-    update_history_list = pyqtSignal(list)
+    update_history_list = pyqtSignal(int, list)
     update_progress = pyqtSignal(int, str)
-    update_performance = pyqtSignal(str, float)
-    update_log = pyqtSignal(str, str)
     clear_harmony_table = pyqtSignal()
+    port_opened = pyqtSignal(int, str, object, str)
 
     def __init__(self):
         super().__init__()
@@ -112,52 +344,63 @@ class MIDIVirtualPlayer(QMainWindow):
         
         # 初始化
         self.init_attributes()
-        self.precompute_note_info()
         self.setup_ui()
         self.setup_signals()
         self.start_threads()
         
         # 启动定时器
+        # 界面刷新定时器：每帧(约16ms)合并发送一次复音/乐理/历史更新
         self.ui_timer = QTimer()
-        self.ui_timer.setInterval(1)
+        self.ui_timer.setInterval(16)
         self.ui_timer.timeout.connect(self.process_ui_queue)
         self.ui_timer.start()
         
+        # 状态刷新定时器：性能标签和进度显示在同一次回调中刷新
         self.perf_timer = QTimer()
-        self.perf_timer.setInterval(10)
-        self.perf_timer.timeout.connect(self.update_performance_data)
+        self.perf_timer.setInterval(100)
+        self.perf_timer.timeout.connect(self.refresh_status_display)
         self.perf_timer.start()
         
-        # 进度更新定时器
-        self.progress_timer = QTimer()
-        self.progress_timer.setInterval(50)
-        self.progress_timer.timeout.connect(self.update_progress_display)
-        self.progress_timer.start()
+        # 日志刷新定时器
+        self.log_timer = QTimer()
+        self.log_timer.setInterval(100)
+        self.log_timer.timeout.connect(self.flush_log_buffer)
+        self.log_timer.start()
         
-        self.update_status.emit("就绪 - 请添加MIDI文件并连接端口", self.colors['accent2'])
+        self.update_status.emit("就绪 - 请添加MIDI文件并连接端口", STATUS_IDLE)
 
     def init_attributes(self):
         # 核心状态
         self.midi_files = []
+        self.midi_file_set = set()  # 与midi_files同步，用于去重判断
         self.current_file_index = -1
         self.is_playing = False
         self.is_paused = False
+        self.pause_started = 0  # 本次暂停开始时刻（perf_counter_ns）
+        self.paused_total_ns = 0  # 累计暂停时长（纳秒），由resume_play累加，播放线程据此顺延发送时刻
         self.output_ports = [None, None]
-        self.play_start_time = None
+        self.port_senders = [None, None]  # 与output_ports对应的发送线程
+        self.active_port_senders = ()  # 已连接端口的发送线程，仅在连接/断开时更新，播放线程直接读取
+        self.active_port_count = 0
+        self.play_start_time = None  # 播放开始时刻（perf_counter_ns）
         self.total_file_duration = 0
+        self.duration_cache = {}  # 文件路径 -> 播放时长（秒），添加文件时在后台计算
         self.current_play_time = 0.0
         self.message_count = 0
-        self.last_perf_update = time.time()
+        self.last_perf_update = time.perf_counter_ns()
         self.last_message_count = 0
-        self.total_latency = 0.0
-        self.latency_count = 0
         
-        # 当前播放的MIDI文件
-        self.current_midi_file = None
+        # 已解析的播放事件：文件路径 -> [(绝对时间秒, 消息), ...]，按最近播放排序，最多PARSED_CACHE_SIZE项
+        self.parsed_cache = {}
         
         # 音符追踪
         self.active_notes = dict()
+        self.sorted_active_notes = []  # 活跃音符号，按音高有序维护
+        self.last_chord_key = None  # 上次识别和弦时的活跃音符
+        self.last_chord_name = ""
         self.note_history = deque(maxlen=50)
+        self.history_total = 0  # 累计写入的历史记录数，界面据此只插入新增的行
+        self.history_shown_total = 0
         
         # 控制事件
         self.stop_event = threading.Event()
@@ -166,9 +409,23 @@ class MIDIVirtualPlayer(QMainWindow):
         
         # 队列
         self.play_queue = queue.Queue(maxsize=5)
-        self.midi_event_queue = queue.Queue(maxsize=500)
-        self.note_info_queue = queue.Queue(maxsize=50)
-        self.ui_queue = queue.Queue(maxsize=200)
+        # 音符事件：播放线程追加、音符线程批量取出（deque两端操作无需加锁），积压过多时丢弃最旧的
+        self.note_info_queue = deque(maxlen=2000)
+        self.note_event_ready = threading.Event()
+        
+        # 音符线程写入的最新界面快照，由ui_timer每帧取走（None表示无新数据）
+        self.pending_harmony = None
+        self.pending_theory = None
+        self.pending_history = None
+        
+        # 日志缓冲：任意线程追加，由log_timer定时批量写入日志框
+        self.log_buffer = deque()
+        self.log_formats = {}
+        for level, color in (('DEBUG', '#808080'), ('INFO', '#000000'), ('WARN', '#FF8C00'),
+                             ('ERROR', '#FF0000'), ('SUCCESS', '#008000')):
+            log_format = QTextCharFormat()
+            log_format.setForeground(QColor(color))
+            self.log_formats[level] = log_format
         
         # 线程
         self.threads = {}
@@ -176,25 +433,6 @@ class MIDIVirtualPlayer(QMainWindow):
         # 日志级别
         self.log_levels = {'DEBUG': False, 'INFO': True, 'WARN': True, 'ERROR': True}
 
-    def precompute_note_info(self):
-        self.note_info_cache = {}
-        note_names = ['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B']
-        
-        for midi_note in range(128):
-            octave = (midi_note // 12) - 1
-            note_index = midi_note % 12
-            note_name = f"{note_names[note_index]}{octave}"
-            frequency = 440.0 * (2.0 ** ((midi_note - 69) / 12.0))
-            
-            self.note_info_cache[midi_note] = {
-                'name': note_name,
-                'note_letter': note_names[note_index],
-                'octave': octave,
-                'frequency': frequency,
-                'midi_note': midi_note,
-                'note_index': note_index
-            }
-
     def setup_ui(self):
         # 中央窗口
         central_widget = QWidget()
@@ -236,21 +474,21 @@ class MIDIVirtualPlayer(QMainWindow):
         port1_layout.setSpacing(4)
         
         self.port1_label = QLabel("端口1:")
-        self.port1_label.setStyleSheet("font-size: 11pt; font-weight: bold;")
+        self.port1_label.setStyleSheet(TITLE_STYLE)
         
         port1_combo_layout = QHBoxLayout()
         port1_combo_layout.setSpacing(6)
         
         self.port1_combo = QComboBox()
         self.port1_combo.setFixedWidth(150)
-        self.port1_combo.setStyleSheet("font-size: 10pt;")
+        self.port1_combo.setStyleSheet(TEXT_STYLE)
         
         self.connect1_btn = QPushButton("连接")
         self.connect1_btn.setFixedSize(60, 28)
-        self.connect1_btn.setStyleSheet("font-size: 10pt; padding: 4px;")
+        self.connect1_btn.setStyleSheet(BUTTON_STYLE)
         
         self.port1_status = QLabel("未连接")
-        self.port1_status.setStyleSheet("font-size: 9pt; color: red; font-weight: bold;")
+        self.port1_status.setStyleSheet(PORT_OFFLINE_STYLE)
         
         port1_combo_layout.addWidget(self.port1_combo)
         port1_combo_layout.addWidget(self.connect1_btn)
@@ -265,21 +503,21 @@ class MIDIVirtualPlayer(QMainWindow):
         port2_layout.setSpacing(4)
         
         self.port2_label = QLabel("端口2:")
-        self.port2_label.setStyleSheet("font-size: 11pt; font-weight: bold;")
+        self.port2_label.setStyleSheet(TITLE_STYLE)
         
         port2_combo_layout = QHBoxLayout()
         port2_combo_layout.setSpacing(6)
         
         self.port2_combo = QComboBox()
         self.port2_combo.setFixedWidth(150)
-        self.port2_combo.setStyleSheet("font-size: 10pt;")
+        self.port2_combo.setStyleSheet(TEXT_STYLE)
         
         self.connect2_btn = QPushButton("连接")
         self.connect2_btn.setFixedSize(60, 28)
-        self.connect2_btn.setStyleSheet("font-size: 10pt; padding: 4px;")
+        self.connect2_btn.setStyleSheet(BUTTON_STYLE)
         
         self.port2_status = QLabel("未连接")
-        self.port2_status.setStyleSheet("font-size: 9pt; color: red; font-weight: bold;")
+        self.port2_status.setStyleSheet(PORT_OFFLINE_STYLE)
         
         port2_combo_layout.addWidget(self.port2_combo)
         port2_combo_layout.addWidget(self.connect2_btn)
@@ -291,12 +529,12 @@ class MIDIVirtualPlayer(QMainWindow):
         # 测试按钮
         self.test_btn = QPushButton("测试连接")
         self.test_btn.setFixedSize(100, 30)
-        self.test_btn.setStyleSheet("font-size: 10pt; padding: 4px;")
+        self.test_btn.setStyleSheet(BUTTON_STYLE)
         self.test_btn.setEnabled(False)
         
         # 状态显示
         self.status_label = QLabel("就绪 - 请添加MIDI文件并连接端口")
-        self.status_label.setStyleSheet("font-size: 11pt; font-weight: bold; color: #4A90E2;")
+        self.status_label.setStyleSheet(STATUS_STYLE.format(0x4A90E2))
         self.status_label.setFixedWidth(400)
         
         port_layout.addLayout(port1_layout)
@@ -315,7 +553,7 @@ class MIDIVirtualPlayer(QMainWindow):
         
         # 文件管理
         file_group = QGroupBox("文件管理")
-        file_group.setStyleSheet("font-size: 11pt; font-weight: bold;")
+        file_group.setStyleSheet(TITLE_STYLE)
         file_layout = QVBoxLayout(file_group)
         file_layout.setContentsMargins(6, 6, 6, 6)
         file_layout.setSpacing(6)
@@ -325,15 +563,15 @@ class MIDIVirtualPlayer(QMainWindow):
         
         self.add_btn = QPushButton("添加文件")
         self.add_btn.setFixedSize(80, 30)
-        self.add_btn.setStyleSheet("font-size: 10pt; padding: 4px;")
+        self.add_btn.setStyleSheet(BUTTON_STYLE)
         
         self.remove_btn = QPushButton("移除选中")
         self.remove_btn.setFixedSize(80, 30)
-        self.remove_btn.setStyleSheet("font-size: 10pt; padding: 4px;")
+        self.remove_btn.setStyleSheet(BUTTON_STYLE)
         
         self.clear_btn = QPushButton("清空列表")
         self.clear_btn.setFixedSize(80, 30)
-        self.clear_btn.setStyleSheet("font-size: 10pt; padding: 4px;")
+        self.clear_btn.setStyleSheet(BUTTON_STYLE)
         
         file_btn_layout.addWidget(self.add_btn)
         file_btn_layout.addWidget(self.remove_btn)
@@ -341,14 +579,14 @@ class MIDIVirtualPlayer(QMainWindow):
         
         self.file_list = QListWidget()
         self.file_list.setFixedHeight(80)
-        self.file_list.setStyleSheet("font-size: 10pt;")
+        self.file_list.setStyleSheet(TEXT_STYLE)
         
         file_layout.addLayout(file_btn_layout)
         file_layout.addWidget(self.file_list)
         
         # 播放控制
         control_group = QGroupBox("播放控制")
-        control_group.setStyleSheet("font-size: 11pt; font-weight: bold;")
+        control_group.setStyleSheet(TITLE_STYLE)
         control_layout = QVBoxLayout(control_group)
         control_layout.setContentsMargins(6, 6, 6, 6)
         control_layout.setSpacing(6)
@@ -359,20 +597,20 @@ class MIDIVirtualPlayer(QMainWindow):
         
         self.play_btn = QPushButton("播放")
         self.play_btn.setFixedSize(70, 32)
-        self.play_btn.setStyleSheet("font-size: 11pt; padding: 4px;")
+        self.play_btn.setStyleSheet(MAIN_BUTTON_STYLE)
         
         self.stop_btn = QPushButton("停止")
         self.stop_btn.setFixedSize(70, 32)
-        self.stop_btn.setStyleSheet("font-size: 11pt; padding: 4px;")
+        self.stop_btn.setStyleSheet(MAIN_BUTTON_STYLE)
         self.stop_btn.setEnabled(False)
         
         self.prev_btn = QPushButton("上一首")
         self.prev_btn.setFixedSize(70, 32)
-        self.prev_btn.setStyleSheet("font-size: 10pt; padding: 4px;")
+        self.prev_btn.setStyleSheet(BUTTON_STYLE)
         
         self.next_btn = QPushButton("下一首")
         self.next_btn.setFixedSize(70, 32)
-        self.next_btn.setStyleSheet("font-size: 10pt; padding: 4px;")
+        self.next_btn.setStyleSheet(BUTTON_STYLE)
         
         play_btn_layout.addWidget(self.play_btn)
         play_btn_layout.addWidget(self.stop_btn)
@@ -384,7 +622,7 @@ class MIDIVirtualPlayer(QMainWindow):
         progress_layout.setSpacing(8)
         
         self.progress_label = QLabel("00:00 / 00:00")
-        self.progress_label.setStyleSheet("font-size: 10pt; font-weight: bold;")
+        self.progress_label.setStyleSheet(LABEL_STYLE)
         self.progress_label.setFixedWidth(100)
         
         self.progress_bar = QProgressBar()
@@ -430,7 +668,7 @@ class MIDIVirtualPlayer(QMainWindow):
         harmony_layout.setSpacing(2)
         
         harmony_group = QGroupBox("复音信息")
-        harmony_group.setStyleSheet("font-size: 11pt; font-weight: bold;")
+        harmony_group.setStyleSheet(TITLE_STYLE)
         harmony_inner_layout = QVBoxLayout(harmony_group)
         harmony_inner_layout.setContentsMargins(6, 6, 6, 6)
         
@@ -473,7 +711,7 @@ class MIDIVirtualPlayer(QMainWindow):
         
         # 性能监控
         perf_group = QGroupBox("实时性能监控 (10ms更新)")
-        perf_group.setStyleSheet("font-size: 11pt; font-weight: bold;")
+        perf_group.setStyleSheet(TITLE_STYLE)
         perf_layout = QGridLayout(perf_group)
         perf_layout.setContentsMargins(6, 6, 6, 6)
         perf_layout.setSpacing(6)
@@ -510,7 +748,7 @@ class MIDIVirtualPlayer(QMainWindow):
         
         # 乐理知识
         theory_group = QGroupBox("乐理知识")
-        theory_group.setStyleSheet("font-size: 11pt; font-weight: bold;")
+        theory_group.setStyleSheet(TITLE_STYLE)
         theory_layout = QVBoxLayout(theory_group)
         theory_layout.setContentsMargins(6, 6, 6, 6)
         
@@ -524,7 +762,7 @@ class MIDIVirtualPlayer(QMainWindow):
         
         # 历史记录
         history_group = QGroupBox("音符历史")
-        history_group.setStyleSheet("font-size: 11pt; font-weight: bold;")
+        history_group.setStyleSheet(TITLE_STYLE)
         history_layout = QVBoxLayout(history_group)
         history_layout.setContentsMargins(6, 6, 6, 6)
         
@@ -542,7 +780,7 @@ class MIDIVirtualPlayer(QMainWindow):
         
         # 日志区域
         log_group = QGroupBox("系统日志")
-        log_group.setStyleSheet("font-size: 11pt; font-weight: bold;")
+        log_group.setStyleSheet(TITLE_STYLE)
         log_layout = QHBoxLayout(log_group)
         log_layout.setContentsMargins(6, 6, 6, 6)
         log_layout.setSpacing(6)
@@ -558,7 +796,7 @@ class MIDIVirtualPlayer(QMainWindow):
         filter_layout.setSpacing(4)
         
         filter_label = QLabel("日志级别:")
-        filter_label.setStyleSheet("font-size: 10pt; font-weight: bold;")
+        filter_label.setStyleSheet(LABEL_STYLE)
         
         self.debug_check = QCheckBox("调试")
         self.info_check = QCheckBox("信息")
@@ -568,7 +806,7 @@ class MIDIVirtualPlayer(QMainWindow):
         # 设置复选框样式
         checkboxes = [self.debug_check, self.info_check, self.warn_check, self.error_check]
         for cb in checkboxes:
-            cb.setStyleSheet("font-size: 10pt;")
+            cb.setStyleSheet(TEXT_STYLE)
             cb.setFixedSize(60, 20)
         
         self.info_check.setChecked(True)
@@ -685,9 +923,8 @@ class MIDIVirtualPlayer(QMainWindow):
         self.update_theory_text.connect(self.on_update_theory_text)
         self.update_history_list.connect(self.on_update_history_list)
         self.update_progress.connect(self.on_update_progress)
-        self.update_performance.connect(self.on_update_performance)
-        self.update_log.connect(self.on_update_log)
         self.clear_harmony_table.connect(self.on_clear_harmony_table)
+        self.port_opened.connect(self.on_port_opened)
 
     def start_threads(self):
         # 文件解析线程（直接播放）
@@ -698,14 +935,6 @@ class MIDIVirtualPlayer(QMainWindow):
         )
         self.threads['file_parser'].start()
         
-        # MIDI发送线程
-        self.threads['midi_sender'] = threading.Thread(
-            target=self.midi_sender_thread,
-            daemon=True,
-            name="MIDISender"
-        )
-        self.threads['midi_sender'].start()
-        
         # 音符处理线程
         self.threads['note_processor'] = threading.Thread(
             target=self.note_processor_thread,
@@ -720,20 +949,17 @@ class MIDIVirtualPlayer(QMainWindow):
             self.port1_combo.addItems(ports)
             self.port2_combo.addItems(ports)
             
-            # 自动选择第一个可用的虚拟端口
-            for i, port in enumerate(ports):
-                if "Virtual" in port or "LoopMIDI" in port:
-                    if self.port1_combo.currentIndex() == -1:
-                        self.port1_combo.setCurrentIndex(i)
-                    elif self.port2_combo.currentIndex() == -1 and i != self.port1_combo.currentIndex():
-                        self.port2_combo.setCurrentIndex(i)
-                    if self.port1_combo.currentIndex() != -1 and self.port2_combo.currentIndex() != -1:
-                        break
+            # 自动选择前两个可用的虚拟端口
+            candidates = [i for i, port in enumerate(ports) if VIRTUAL_PORT_PATTERN.search(port)]
+            if candidates:
+                self.port1_combo.setCurrentIndex(candidates[0])
+                if len(candidates) > 1:
+                    self.port2_combo.setCurrentIndex(candidates[1])
                     
-            self.log_message(f"检测到 {len(ports)} 个MIDI输出端口", "INFO")
+            self.log_message("检测到 %d 个MIDI输出端口", "INFO", len(ports))
         except Exception as e:
-            self.log_message(f"MIDI端口检测失败: {str(e)}", "ERROR")
-            self.update_status.emit("MIDI检测失败", QColor(255, 0, 0))
+            self.log_message("MIDI端口检测失败: %s", "ERROR", e)
+            self.update_status.emit("MIDI检测失败", STATUS_ERROR)
 
     def connect_port(self, port_index):
         if port_index not in [0, 1]:
@@ -751,12 +977,15 @@ class MIDIVirtualPlayer(QMainWindow):
         try:
             # 检查端口是否已连接
             if self.output_ports[port_index]:
-                self.output_ports[port_index].close()
+                # 先从活跃端口中移除并停止其发送线程再关闭，不会再向已关闭的端口发送
+                port = self.output_ports[port_index]
                 self.output_ports[port_index] = None
+                self.update_port_count()
+                port.close()
                 connect_btn.setText("连接")
                 port_status.setText("未连接")
-                port_status.setStyleSheet("font-size: 9pt; color: red; font-weight: bold;")
-                self.log_message(f"已断开MIDI端口{port_index + 1}: {port_name}", "INFO")
+                port_status.setStyleSheet(PORT_OFFLINE_STYLE)
+                self.log_message("已断开MIDI端口%d: %s", "INFO", port_index + 1, port_name)
             else:
                 # 检查是否与另一个端口冲突
                 other_port = self.output_ports[1 - port_index]
@@ -764,56 +993,100 @@ class MIDIVirtualPlayer(QMainWindow):
                     QMessageBox.warning(self, "警告", f"端口{port_name}已被端口{2 - port_index}使用")
                     return
                     
-                self.output_ports[port_index] = mido.open_output(port_name, autoreset=True)
-                connect_btn.setText("断开")
-                port_status.setText(f"已连接")
-                port_status.setStyleSheet("font-size: 9pt; color: green; font-weight: bold;")
-                self.log_message(f"成功连接到MIDI端口{port_index + 1}: {port_name}", "INFO")
-                
-            # 更新测试按钮状态和端口计数
-            active_ports = len([port for port in self.output_ports if port is not None])
-            self.test_btn.setEnabled(active_ports > 0)
-            self.port_label.setText(f"活跃端口: {active_ports}")
+                # 打开端口可能阻塞较久，放到后台线程，完成后通过port_opened信号回到界面线程
+                connect_btn.setEnabled(False)
+                port_status.setText("连接中...")
+                threading.Thread(
+                    target=self.open_port_worker,
+                    args=(port_index, port_name),
+                    daemon=True,
+                    name=f"PortOpener{port_index + 1}"
+                ).start()
             
         except Exception as e:
-            self.log_message(f"MIDI端口{port_index + 1}连接失败: {str(e)}", "ERROR")
+            self.log_message("MIDI端口%d连接失败: %s", "ERROR", port_index + 1, e)
             QMessageBox.critical(self, "错误", f"端口{port_index + 1}连接失败: {str(e)}")
 
+    def open_port_worker(self, port_index, port_name):
+        """后台打开MIDI输出端口"""
+        try:
+            port = mido.open_output(port_name, autoreset=True)
+        except Exception as e:
+            self.port_opened.emit(port_index, port_name, None, str(e))
+        else:
+            self.port_opened.emit(port_index, port_name, port, "")
+
+    @pyqtSlot(int, str, object, str)
+    def on_port_opened(self, port_index, port_name, port, error):
+        connect_btn = self.connect1_btn if port_index == 0 else self.connect2_btn
+        port_status = self.port1_status if port_index == 0 else self.port2_status
+        connect_btn.setEnabled(True)
+        
+        # 等待期间另一个端口可能已占用同名端口
+        other_port = self.output_ports[1 - port_index]
+        if port is not None and other_port and other_port.name == port_name:
+            port.close()
+            port = None
+            error = f"端口{port_name}已被端口{2 - port_index}使用"
+            
+        if port is None:
+            port_status.setText("未连接")
+            self.log_message("MIDI端口%d连接失败: %s", "ERROR", port_index + 1, error)
+            QMessageBox.critical(self, "错误", f"端口{port_index + 1}连接失败: {error}")
+            return
+            
+        self.output_ports[port_index] = port
+        connect_btn.setText("断开")
+        port_status.setText(f"已连接")
+        port_status.setStyleSheet(PORT_ONLINE_STYLE)
+        self.log_message("成功连接到MIDI端口%d: %s", "INFO", port_index + 1, port_name)
+        self.update_port_count()
+
+    def update_port_count(self):
+        """按output_ports同步各端口的发送线程，刷新活跃端口缓存，并更新测试按钮状态和端口计数"""
+        for i, port in enumerate(self.output_ports):
+            sender = self.port_senders[i]
+            if sender is not None and sender.port is not port:
+                sender.close()
+                sender = None
+            if sender is None and port is not None:
+                sender = PortSender(port, self.log_message)
+            self.port_senders[i] = sender
+        self.active_port_senders = tuple(sender for sender in self.port_senders if sender is not None)
+        self.active_port_count = len(self.active_port_senders)
+        self.test_btn.setEnabled(self.active_port_count > 0)
+        self.port_label.setText(f"活跃端口: {self.active_port_count}")
+
     def send_test_signal(self):
-        active_ports = [port for port in self.output_ports if port is not None]
+        active_ports = self.active_port_senders
         if not active_ports:
             QMessageBox.warning(self, "警告", "请先连接至少一个MIDI端口")
             return
             
         try:
-            chords = [
-                ([60, 64, 67], "C大三和弦"),
-                ([60, 63, 67], "C小三和弦"),
-            ]
-            
-            for chord_notes, chord_name in chords:
-                self.log_message(f"测试播放: {chord_name} (通过{len(active_ports)}个端口)", "INFO")
+            for note_on_msgs, note_off_msgs, chord_name in TEST_CHORDS:
+                self.log_message("测试播放: %s (通过%d个端口)", "INFO", chord_name, len(active_ports))
                 
                 # 同时发送到所有活跃端口
                 for port in active_ports:
-                    for note in chord_notes:
-                        port.send(mido.Message('note_on', note=note, velocity=64))
+                    for msg in note_on_msgs:
+                        port.send(msg)
                 time.sleep(0.001)
                 
                 time.sleep(0.5)
                 
                 # 同时关闭所有活跃端口的音符
                 for port in active_ports:
-                    for note in chord_notes:
-                        port.send(mido.Message('note_off', note=note, velocity=64))
+                    for msg in note_off_msgs:
+                        port.send(msg)
                 time.sleep(0.001)
                 
                 time.sleep(0.3)
                 
-            self.log_message(f"MIDI连接测试成功 - 通过{len(active_ports)}个端口", "INFO")
-            self.update_status.emit(f"连接测试成功 (使用{len(active_ports)}个端口)", QColor(0, 255, 0))
+            self.log_message("MIDI连接测试成功 - 通过%d个端口", "INFO", len(active_ports))
+            self.update_status.emit(f"连接测试成功 (使用{len(active_ports)}个端口)", STATUS_OK)
         except Exception as e:
-            self.log_message(f"测试信号发送失败: {str(e)}", "ERROR")
+            self.log_message("测试信号发送失败: %s", "ERROR", e)
 
     def add_files(self):
         files, _ = QFileDialog.getOpenFileNames(
@@ -821,47 +1094,91 @@ class MIDIVirtualPlayer(QMainWindow):
         )
         
         if files:
-            count = 0
-            for file in files:
-                if file not in self.midi_files:
-                    self.midi_files.append(file)
-                    filename = os.path.basename(file)
-                    size = os.path.getsize(file)
-                    self.file_list.addItem(f"{filename} ({size} bytes)")
-                    count += 1
-                    
+            known = self.midi_file_set
+            new_files = [file for file in files if file not in known]
+            count = len(new_files)
+            
             if count > 0:
-                self.log_message(f"添加了 {count} 个MIDI文件", "INFO")
+                # 一次性添加所有列表项，只重绘一次
+                items = [f"{os.path.basename(file)} ({os.stat(file).st_size} bytes)" for file in new_files]
+                self.midi_files.extend(new_files)
+                known.update(new_files)
+                threading.Thread(
+                    target=self.cache_file_durations,
+                    args=(new_files,),
+                    daemon=True,
+                    name="DurationScanner"
+                ).start()
+                self.file_list.setUpdatesEnabled(False)
+                self.file_list.addItems(items)
+                self.file_list.setUpdatesEnabled(True)
+                
+                self.log_message("添加了 %d 个MIDI文件", "INFO", count)
                 if len(self.midi_files) == count:
                     self.file_list.setCurrentRow(0)
                     self.current_file_index = 0
 
+    def cache_file_durations(self, files):
+        """后台解析文件并缓存播放时长，开始播放时直接取用"""
+        for file in files:
+            if file in self.duration_cache:
+                continue
+            try:
+                duration = mido.MidiFile(file, clip=True).length
+                # 计算期间文件可能已被移出列表
+                if file in self.midi_file_set:
+                    self.duration_cache[file] = duration
+            except Exception as e:
+                self.log_message("计算文件时长失败: %s %s", "WARN", os.path.basename(file), e)
+
+    def load_file_events(self, file_path):
+        """解析文件为按绝对时间排列的消息列表，只缓存最近播放的几首，重复播放不再解析"""
+        cache = self.parsed_cache
+        events = cache.pop(file_path, None)
+        if events is None:
+            events = []
+            event_time = 0.0
+            for msg in mido.MidiFile(file_path, clip=True):
+                event_time += msg.time
+                if not msg.is_meta:
+                    events.append((event_time, msg))
+            self.duration_cache[file_path] = event_time
+        # 重新插入到末尾，淘汰最久未播放的（界面线程只做pop/clear，这里先复制键列表）
+        cache[file_path] = events
+        for stale in list(cache)[:-PARSED_CACHE_SIZE]:
+            cache.pop(stale, None)
+        return events
+
     def remove_selected(self):
         selected = self.file_list.currentRow()
         if selected >= 0:
             file = self.midi_files.pop(selected)
+            self.midi_file_set.discard(file)
+            self.parsed_cache.pop(file, None)
+            self.duration_cache.pop(file, None)
             self.file_list.takeItem(selected)
-            self.log_message(f"移除文件: {os.path.basename(file)}", "INFO")
+            self.log_message("移除文件: %s", "INFO", os.path.basename(file))
             
             if self.current_file_index == selected:
                 self.current_file_index = -1
-                self.update_status.emit("就绪 - 请选择文件", self.colors['accent2'])
+                self.update_status.emit("就绪 - 请选择文件", STATUS_IDLE)
             elif self.current_file_index > selected:
                 self.current_file_index -= 1
 
     def clear_list(self):
         if QMessageBox.question(self, "确认", "确定要清空所有文件吗？") == QMessageBox.StandardButton.Yes:
             self.midi_files.clear()
+            self.midi_file_set.clear()
+            self.parsed_cache.clear()
+            self.duration_cache.clear()
             self.file_list.clear()
             self.current_file_index = -1
-            self.current_midi_file = None
             self.total_file_duration = 0
-            self.update_status.emit("就绪 - 请添加MIDI文件", self.colors['accent2'])
+            self.update_status.emit("就绪 - 请添加MIDI文件", STATUS_IDLE)
             self.log_message("已清空文件列表", "INFO")
 
     def toggle_play(self):
-        active_ports = [port for port in self.output_ports if port is not None]
-        if not active_ports:
+        if not self.active_port_count:
             QMessageBox.warning(self, "警告", "请至少连接一个MIDI端口")
             return
             
@@ -884,27 +1201,18 @@ class MIDIVirtualPlayer(QMainWindow):
             
         if 0 <= self.current_file_index < len(self.midi_files):
             file_path = self.midi_files[self.current_file_index]
-            
-            try:
-                # 直接解析MIDI文件
-                self.current_midi_file = mido.MidiFile(file_path)
-                # 计算总时长（简化版）
-                self.total_file_duration = sum(msg.time for track in self.current_midi_file.tracks for msg in track if not msg.is_meta)
-                
-            except Exception as e:
-                self.log_message(f"解析MIDI文件失败: {str(e)}", "ERROR")
-                self.update_status.emit("文件加载失败", QColor(255, 0, 0))
-                return
+            # 文件在播放线程中解析，时长未缓存时由播放线程解析后补上
+            self.total_file_duration = self.duration_cache.get(file_path, 0)
             
             self.is_playing = True
             self.is_paused = False
-            self.play_start_time = time.time()
+            self.play_start_time = None  # 由播放线程在文件解析完成后设置
             self.current_play_time = 0.0
             self.message_count = 0
             self.last_message_count = 0
-            self.last_perf_update = time.time()
-            self.total_latency = 0.0
-            self.latency_count = 0
+            self.last_perf_update = time.perf_counter_ns()
+            for sender in self.active_port_senders:
+                sender.reset_stats()
             
             self.stop_event.clear()
             self.pause_event.set()
@@ -913,16 +1221,11 @@ class MIDIVirtualPlayer(QMainWindow):
             self.stop_btn.setEnabled(True)
             
             filename = os.path.basename(file_path)
-            active_ports = len([p for p in self.output_ports if p is not None])
-            self.update_status.emit(f"正在播放: {filename} (x{active_ports})", QColor(0, 255, 0))
-            self.log_message(f"开始播放: {filename}", "INFO")
+            self.update_status.emit(f"正在播放: {filename} (x{self.active_port_count})", STATUS_OK)
+            self.log_message("开始播放: %s", "INFO", filename)
             
             # 清空队列
-            while not self.play_queue.empty():
-                try:
-                    self.play_queue.get_nowait()
-                except queue.Empty:
-                    break
+            drain_queue(self.play_queue)
                     
             # 开始播放
             self.play_queue.put((file_path, self.current_file_index))
@@ -930,18 +1233,23 @@ class MIDIVirtualPlayer(QMainWindow):
     def pause_play(self):
         self.is_paused = True
         self.pause_event.clear()
+        self.pause_started = time.perf_counter_ns()
         self.play_btn.setText("播放")
         file = os.path.basename(self.midi_files[self.current_file_index])
-        self.update_status.emit(f"已暂停: {file}", QColor(255, 165, 0))
+        self.update_status.emit(f"已暂停: {file}", STATUS_PAUSED)
         self.log_message("播放已暂停", "INFO")
 
     def resume_play(self):
+        # 播放线程和进度计时都顺延整段暂停时长（先累加再唤醒播放线程）
+        paused_ns = time.perf_counter_ns() - self.pause_started
+        self.paused_total_ns += paused_ns
+        if self.play_start_time is not None:
+            self.play_start_time += paused_ns
         self.is_paused = False
         self.pause_event.set()
         self.play_btn.setText("暂停")
         file = os.path.basename(self.midi_files[self.current_file_index])
-        active_ports = len([p for p in self.output_ports if p is not None])
-        self.update_status.emit(f"正在播放: {file} (x{active_ports})", QColor(0, 255, 0))
+        self.update_status.emit(f"正在播放: {file} (x{self.active_port_count})", STATUS_OK)
         self.log_message("播放已恢复", "INFO")
 
     def stop_play(self):
@@ -954,26 +1262,23 @@ class MIDIVirtualPlayer(QMainWindow):
         self.pause_event.set()
         
         # 清空队列
-        while not self.play_queue.empty():
-            try:
-                self.play_queue.get_nowait()
-            except queue.Empty:
-                break
-                
-        while not self.midi_event_queue.empty():
-            try:
-                self.midi_event_queue.get_nowait()
-            except queue.Empty:
-                break
+        drain_queue(self.play_queue)
+        self.note_info_queue.clear()
+        for sender in self.active_port_senders:
+            sender.clear()
                 
         self.active_notes.clear()
+        self.sorted_active_notes.clear()
         self.note_history.clear()
-        self.current_midi_file = None
+        self.history_total = 0
+        self.pending_harmony = None
+        self.pending_theory = None
+        self.pending_history = None
         
         self.play_btn.setText("播放")
         self.stop_btn.setEnabled(False)
         self.clear_harmony_table.emit()
-        self.update_history_list.emit([])
+        self.update_history_list.emit(0, [])
         
         # 重置进度条显示
         self.progress_bar.setValue(0)
@@ -984,9 +1289,9 @@ class MIDIVirtualPlayer(QMainWindow):
         
         if self.current_file_index >= 0:
             file = os.path.basename(self.midi_files[self.current_file_index])
-            self.update_status.emit(f"已停止: {file}", QColor(255, 0, 0))
+            self.update_status.emit(f"已停止: {file}", STATUS_ERROR)
         else:
-            self.update_status.emit("就绪 - 请选择文件", self.colors['accent2'])
+            self.update_status.emit("就绪 - 请选择文件", STATUS_IDLE)
             
         self.log_message("播放已停止", "INFO")
 
@@ -996,8 +1301,8 @@ class MIDIVirtualPlayer(QMainWindow):
             self.current_file_index = (self.current_file_index - 1) % len(self.midi_files)
             self.file_list.setCurrentRow(self.current_file_index)
             file = os.path.basename(self.midi_files[self.current_file_index])
-            self.update_status.emit(f"准备播放: {file}", self.colors['accent2'])
-            self.log_message(f"切换到上一首: {file}", "INFO")
+            self.update_status.emit(f"准备播放: {file}", STATUS_IDLE)
+            self.log_message("切换到上一首: %s", "INFO", file)
 
     def next_file(self):
         if self.midi_files:
@@ -1005,11 +1310,11 @@ class MIDIVirtualPlayer(QMainWindow):
             self.current_file_index = (self.current_file_index + 1) % len(self.midi_files)
             self.file_list.setCurrentRow(self.current_file_index)
             file = os.path.basename(self.midi_files[self.current_file_index])
-            self.update_status.emit(f"准备播放: {file}", self.colors['accent2'])
-            self.log_message(f"切换到下一首: {file}", "INFO")
+            self.update_status.emit(f"准备播放: {file}", STATUS_IDLE)
+            self.log_message("切换到下一首: %s", "INFO", file)
 
     def file_parser_thread(self):
-        """简化的播放线程 - 直接使用mido的play()方法"""
+        """播放线程 - 解析文件（带缓存）并按时间发送消息"""
         while not self.quit_event.is_set():
             try:
                 file_path, file_index = self.play_queue.get(timeout=0.1)
@@ -1019,54 +1324,56 @@ class MIDIVirtualPlayer(QMainWindow):
                     continue
                     
                 try:
-                    # 直接使用mido的play()方法播放
-                    midi_file = mido.MidiFile(file_path)
-                    start_time = time.time()
+                    events = self.load_file_events(file_path)
+                    if file_index == self.current_file_index:
+                        self.total_file_duration = self.duration_cache[file_path]
+                except Exception as e:
+                    self.log_message("解析MIDI文件失败: %s", "ERROR", e)
+                    self.update_status.emit("文件加载失败", STATUS_ERROR)
+                    events = ()
+                    
+                try:
+                    # 解析期间暂停的，等恢复后才开始计时；起始时刻与暂停累计一起取，解析前后的暂停都不会顺延本曲
+                    self.pause_event.wait()
+                    start_time = time.perf_counter_ns()
+                    pause_base = self.paused_total_ns  # 本曲开始前的暂停累计，只顺延之后新增的暂停
+                    # 解析完成后才公布起始时刻，进度条和时间显示此前保持在开头
+                    if not self.stop_event.is_set() and file_index == self.current_file_index:
+                        self.play_start_time = start_time
                     
-                    for msg in midi_file.play():
+                    for event_time, msg in events:
+                        # 等到消息的发送时刻：暂停时阻塞到恢复（stop_play也会置位该事件），
+                        # 每次醒来都按最新的暂停累计重新计算剩余时间，休止期间的暂停同样顺延，不补发暂停期间的音符
+                        while True:
+                            self.pause_event.wait()
+                            delay = event_time - (time.perf_counter_ns() - start_time - (self.paused_total_ns - pause_base)) / 1e9
+                            if delay <= 0 or self.stop_event.wait(delay):
+                                break
                         if self.stop_event.is_set() or file_index != self.current_file_index:
                             break
                             
-                        # 等待暂停状态
-                        while self.is_paused and not self.stop_event.is_set():
-                            time.sleep(0.001)
-                            
-                        if self.stop_event.is_set():
-                            break
-                            
-                        # 更新当前播放时间
-                        self.current_play_time = time.time() - start_time
-                        
-                        # 同时发送到所有活跃端口
-                        active_ports = [port for port in self.output_ports if port is not None]
-                        if active_ports and not msg.is_meta:
-                            send_start = time.time()
-                            
-                            # 发送到所有端口
-                            for port in active_ports:
-                                port.send(msg)
-                                
-                            send_end = time.time()
-                            latency = (send_end - send_start) * 1000
-                            
-                            # 更新延迟统计
-                            self.total_latency += latency
-                            self.latency_count += 1
+                        # 放入各活跃端口的发送队列，由端口发送线程实际发送
+                        active_ports = self.active_port_senders
+                        if active_ports:
+                            for sender in active_ports:
+                                sender.send(msg)
                             
                             self.message_count += 1
                             
                             # 处理音符消息
-                            if msg.type in ['note_on', 'note_off'] and hasattr(msg, 'note'):
-                                self.note_info_queue.put((msg.type, msg.note, msg.velocity, send_start, self.current_play_time, self.total_file_duration))
+                            msg_type = msg.type
+                            if msg_type in NOTE_MESSAGE_TYPES:
+                                self.note_info_queue.append((msg_type, msg.note, msg.velocity, time.time(), event_time, self.total_file_duration))
+                                self.note_event_ready.set()
                             
                 except Exception as e:
-                    self.log_message(f"播放错误: {str(e)}", "ERROR")
+                    self.log_message("播放错误: %s", "ERROR", e)
                     
                 if not self.stop_event.is_set() and file_index == self.current_file_index:
-                    self.log_message(f"文件播放完成: {os.path.basename(file_path)}", "INFO")
+                    self.log_message("文件播放完成: %s", "INFO", os.path.basename(file_path))
                     
                     if self.current_file_index < len(self.midi_files) - 1:
-                        self.update_status.emit("准备播放下一首", self.colors['accent2'])
+                        self.update_status.emit("准备播放下一首", STATUS_IDLE)
                         QTimer.singleShot(1000, self.next_file)
                         QTimer.singleShot(1500, self.toggle_play)
                     else:
@@ -1077,84 +1384,81 @@ class MIDIVirtualPlayer(QMainWindow):
             except queue.Empty:
                 continue
             except Exception as e:
-                self.log_message(f"播放线程错误: {str(e)}", "ERROR")
+                self.log_message("播放线程错误: %s", "ERROR", e)
                 time.sleep(0.1)
 
-    def midi_sender_thread(self):
-        """这个线程现在主要用于处理音符信息，实际发送由file_parser_thread处理"""
-        while not self.quit_event.is_set():
-            time.sleep(0.1)
-
     def note_processor_thread(self):
         while not self.quit_event.is_set():
             try:
+                # 等待播放线程通知，超时后照常刷新持续时间
+                self.note_event_ready.wait(0.016)
+                self.note_event_ready.clear()
+                
+                # 一次取出全部积压的音符事件
                 notes_to_process = []
-                try:
-                    # 批量获取音符事件
-                    for _ in range(5):
-                        notes_to_process.append(self.note_info_queue.get(timeout=0.001))
-                except queue.Empty:
-                    pass
+                note_events = self.note_info_queue
+                while note_events:
+                    notes_to_process.append(note_events.popleft())
                 
                 if notes_to_process:
-                    for msg_type, note, velocity, timestamp, current_time, total_time in notes_to_process:
-                        self.process_single_note(msg_type, note, velocity, timestamp, current_time, total_time)
+                    process_single_note = self.process_single_note
+                    for event in notes_to_process:
+                        process_single_note(*event)
                     
                     self.update_harmony_display()
                     self.update_history_display()
                     
                 else:
-                    if self.active_notes:
+                    # 空闲时只在上一帧快照被取走后才刷新持续时间
+                    if self.active_notes and self.pending_harmony is None:
                         self.update_active_notes_duration()
                         self.update_harmony_display()
-                        
-                    time.sleep(0.001)
                     
             except Exception as e:
-                self.log_message(f"音符处理线程错误: {str(e)}", "ERROR")
+                self.log_message("音符处理线程错误: %s", "ERROR", e)
                 time.sleep(0.01)
 
     def process_single_note(self, msg_type, note, velocity, timestamp, current_time, total_time):
         if msg_type == 'note_on' and velocity > 0:
-            note_info = self.note_info_cache.get(note, {
-                'name': f"未知({note})",
-                'note_letter': f"未知",
-                'octave': "--",
-                'frequency': 0.0,
-                'note_index': -1
-            })
-            
+            history_item = {
+                'type': 'ON',
+                'note': NOTE_NAME[note],
+                'velocity': velocity,
+                'time': timestamp
+            }
+            if note not in self.active_notes:
+                insort(self.sorted_active_notes, note)
+            # 活跃音符直接引用自己的开启记录，关闭时无需在历史中查找
             self.active_notes[note] = {
-                'note_info': note_info,
                 'velocity': velocity,
                 'start_time': timestamp,
                 'current_time': current_time,
-                'total_time': total_time
+                'total_time': total_time,
+                'history_item': history_item
             }
             
-            self.note_history.appendleft({
-                'type': 'ON',
-                'note': note_info['name'],
-                'velocity': velocity,
-                'time': timestamp
-            })
+            self.note_history.appendleft(history_item)
+            self.history_total += 1
             
         elif msg_type == 'note_off' or (msg_type == 'note_on' and velocity == 0):
             if note in self.active_notes:
                 note_data = self.active_notes.pop(note)
+                sorted_notes = self.sorted_active_notes
+                del sorted_notes[bisect_left(sorted_notes, note)]
                 duration = (timestamp - note_data['start_time']) * 1000
+                note_name = NOTE_NAME[note]
                 
-                for item in self.note_history:
-                    if item['type'] == 'ON' and item['note'] == note_data['note_info']['name'] and 'duration' not in item:
-                        item['duration'] = duration
-                        break
+                item = note_data['history_item']
+                item['duration'] = duration
+                item.pop('text', None)
                         
                 self.note_history.appendleft({
                     'type': 'OFF',
-                    'note': note_data['note_info']['name'],
+                    'note': note_name,
                     'duration': duration,
                     'time': timestamp
                 })
+                self.history_total += 1
 
     def update_active_notes_duration(self):
         current_time = time.time()
@@ -1163,42 +1467,49 @@ class MIDIVirtualPlayer(QMainWindow):
 
     def update_harmony_display(self):
         if not self.active_notes:
-            self.clear_harmony_table.emit()
+            self.pending_harmony = []
             return
             
         display_data = []
-        for note_data in sorted(self.active_notes.values(), key=lambda x: x['note_info']['midi_note']):
-            duration = (time.time() - note_data['start_time']) * 1000
+        active_notes = self.active_notes
+        now = time.time()
+        for note in self.sorted_active_notes:
+            note_data = active_notes[note]
+            duration = (now - note_data['start_time']) * 1000
             display_data.append({
-                'note': note_data['note_info']['name'],
-                'octave': str(note_data['note_info']['octave']),
-                'frequency': f"{note_data['note_info']['frequency']:.0f}",
-                'velocity': str(note_data['velocity']),
+                'note': NOTE_NAME[note],
+                'octave': NOTE_OCTAVE_TEXT[note],
+                'frequency': NOTE_FREQUENCY_TEXT[note],
+                'velocity': VELOCITY_TEXT[note_data['velocity']],
                 'duration': f"{duration:.0f}"
             })
             
-        self.update_harmony_table.emit(display_data)
+        self.pending_harmony = display_data
         
         if display_data:
             first_note = display_data[0]['note']
-            theory_info = self.get_music_theory_info(first_note)
-            self.update_theory_text.emit(theory_info)
+            self.pending_theory = self.get_music_theory_info(first_note)
 
     def update_history_display(self):
         history_items = []
         for item in self.note_history:
-            ts = time.strftime("%H:%M:%S", time.localtime(item['time']))
-            ms = int((item['time'] % 1) * 1000)
-            timestamp = f"{ts}.{ms:03d}"
+            # 每条记录的显示文本只格式化一次，补上时长后再重新生成
+            display_text = item.get('text')
+            if display_text is not None:
+                history_items.append(display_text)
+                continue
+                
+            timestamp = format_clock_time(item['time'])
             
             if item['type'] == 'ON':
                 dur_text = f",{item['duration']:.0f}ms" if 'duration' in item else ""
                 display_text = f"[{timestamp}] 🔊 {item['note']}({item['velocity']}){dur_text}"
             else:
                 display_text = f"[{timestamp}] 🔇 {item['note']}({item['duration']:.0f}ms)"
+            item['text'] = display_text
             history_items.append(display_text)
             
-        self.update_history_list.emit(history_items)
+        self.pending_history = (self.history_total, history_items)
 
     def get_music_theory_info(self, note_name):
         if note_name == "--" or note_name == "未知":
@@ -1248,81 +1559,41 @@ class MIDIVirtualPlayer(QMainWindow):
         if len(self.active_notes) < 2:
             return ""
             
-        note_indices = [data['note_info']['note_index'] for data in self.active_notes.values()]
-        note_letters = [data['note_info']['note_letter'] for data in self.active_notes.values()]
-        
-        unique_indices = sorted(list(set(note_indices)))
-        unique_letters = sorted(list(set(note_letters)))
-        
-        if unique_indices:
-            base_index = unique_indices[0]
-            interval_pattern = tuple((idx - base_index) % 12 for idx in unique_indices)
-            
-            chord_patterns = {
-                (0, 4, 7, 11): ('大七和弦', 'Maj7'),
-                (0, 4, 7, 10): ('属七和弦', '7'),
-                (0, 3, 7, 10): ('小七和弦', 'm7'),
-                (0, 3, 6, 10): ('半减七和弦', 'm7b5'),
-                (0, 3, 6, 9): ('减七和弦', 'dim7'),
-                (0, 3, 7, 11): ('小大七和弦', 'mMaj7'),
-                
-                (0, 4, 7): ('大三和弦', 'Maj'),
-                (0, 3, 7): ('小三和弦', 'm'),
-                (0, 3, 6): ('减三和弦', 'dim'),
-                (0, 4, 8): ('增三和弦', 'aug'),
-                
-                (0, 5, 7): ('挂四和弦', 'sus4'),
-                (0, 2, 7): ('挂二和弦', 'sus2'),
-                
-                (0, 4, 7, 9): ('加九和弦', 'add9'),
-                (0, 3, 7, 9): ('小加九和弦', 'madd9'),
-                (0, 4, 7, 6): ('加六和弦', 'add6'),
-            }
+        # 按住的音符不变时直接返回上次结果（根音取最早按下的音，所以按插入顺序作为键）
+        chord_key = tuple(self.active_notes)
+        if chord_key != self.last_chord_key:
+            self.last_chord_key = chord_key
+            self.last_chord_name = self.identify_chord(chord_key)
+        return self.last_chord_name
+
+    def identify_chord(self, notes):
+        # 音级集合编码为12位整数，右移到最低音级对齐后即为音程模式
+        pitch_classes = 0
+        for note in notes:
+            pitch_classes |= NOTE_PITCH_BIT[note]
             
-            if interval_pattern in chord_patterns:
-                chord_cn, chord_en = chord_patterns[interval_pattern]
+        if pitch_classes:
+            interval_pattern = pitch_classes >> ((pitch_classes & -pitch_classes).bit_length() - 1)
+            chord = CHORD_BITMASKS.get(interval_pattern)
+            if chord is not None:
+                chord_cn, chord_en = chord
                 
-                root_note = self.note_info_cache[list(self.active_notes.keys())[0]]['note_letter']
+                root_note = NOTE_LETTER[notes[0]]
                 
                 return f"{root_note}{chord_en} ({chord_cn})"
         
-        chord_by_letters = self.detect_chord_by_letters(unique_letters)
+        unique_letters = sorted(set(NOTE_LETTER[note] for note in notes))
+        chord_by_letters = CHORD_LETTER_PATTERNS.get(frozenset(unique_letters), "")
         if chord_by_letters:
             return chord_by_letters
             
         return f"未知和弦 ({', '.join(unique_letters)})"
 
-    def detect_chord_by_letters(self, note_letters):
-        chord_letter_patterns = {
-            frozenset({'C', 'E', 'G'}): 'C大三和弦',
-            frozenset({'C', 'Eb', 'G'}): 'C小三和弦',
-            frozenset({'C', 'Eb', 'Gb'}): 'C减三和弦',
-            frozenset({'C', 'E', 'G#'}): 'C增三和弦',
-            
-            frozenset({'G', 'B', 'D'}): 'G大三和弦',
-            frozenset({'G', 'Bb', 'D'}): 'G小三和弦',
-            frozenset({'G', 'Bb', 'Db'}): 'G减三和弦',
-            frozenset({'G', 'B', 'D#'}): 'G增三和弦',
-            
-            frozenset({'D', 'F#', 'A'}): 'D大三和弦',
-            frozenset({'D', 'F', 'A'}): 'D小三和弦',
-            frozenset({'D', 'F', 'Ab'}): 'D减三和弦',
-            frozenset({'D', 'F#', 'A#'}): 'D增三和弦',
-        }
-        
-        letter_set = frozenset(note_letters)
-        return chord_letter_patterns.get(letter_set, "")
-
     def all_notes_off(self):
         """发送所有音符关闭到所有端口"""
-        for port in self.output_ports:
-            if port:
-                try:
-                    for channel in range(16):
-                        port.send(mido.Message('control_change', channel=channel, control=123, value=0))
-                        time.sleep(0.0005)
-                except Exception as e:
-                    self.log_message(f"端口{port.name}发送音符关闭消息失败: {str(e)}", "ERROR")
+        # 发送线程逐条连续发送，无需再在界面线程中逐条休眠
+        for sender in self.active_port_senders:
+            sender.send_many(ALL_NOTES_OFF_MESSAGES)
         
         self.log_message("已发送所有音符关闭消息到所有端口", "INFO")
 
@@ -1331,12 +1602,13 @@ class MIDIVirtualPlayer(QMainWindow):
         secs = int(seconds % 60)
         return f"{minutes:02d}:{secs:02d}"
 
-    def log_message(self, message, level="INFO"):
+    def log_message(self, message, level="INFO", *args):
+        """记录日志；带参数时按%格式化，且只在该级别启用时才格式化"""
         if self.log_levels.get(level, False):
-            current_time = time.localtime()
-            ms = int((time.time() % 1) * 1000)
-            timestamp = f"{current_time.tm_hour:02d}:{current_time.tm_min:02d}:{current_time.tm_sec:02d}.{ms:03d}"
-            self.update_log.emit(level, f"[{timestamp}] [{level}] {message}")
+            if args:
+                message = message % args
+            timestamp = format_clock_time(time.time())
+            self.log_buffer.append((level, f"[{timestamp}] [{level}] {message}"))
 
     def update_log_levels(self):
         self.log_levels['DEBUG'] = self.debug_check.isChecked()
@@ -1344,40 +1616,55 @@ class MIDIVirtualPlayer(QMainWindow):
         self.log_levels['WARN'] = self.warn_check.isChecked()
         self.log_levels['ERROR'] = self.error_check.isChecked()
 
+    def refresh_status_display(self):
+        """定时刷新性能标签和播放进度"""
+        if not self.is_window_shown():
+            return
+        self.update_performance_data()
+        self.update_progress_display()
+
     def update_performance_data(self):
         """高频更新性能监控数据"""
         if not self.is_playing:
             return
             
-        current_time = time.time()
-        elapsed = current_time - self.last_perf_update
+        current_time = time.perf_counter_ns()
+        elapsed_ns = current_time - self.last_perf_update
         
-        if elapsed >= 0.005:
+        # 最多每50ms刷新一次，更快的数字变化人眼也读不出
+        if elapsed_ns >= 50_000_000:
             # 计算吞吐量
             new_messages = self.message_count - self.last_message_count
-            throughput = new_messages / elapsed if elapsed > 0 else 0
+            throughput = new_messages * 1_000_000_000 / elapsed_ns
             
-            # 计算平均延迟
-            avg_latency = self.total_latency / self.latency_count if self.latency_count > 0 else 0
+            # 计算最近发送的平均延迟（纳秒换算为毫秒）
+            total_latency = 0
+            latency_count = 0
+            for sender in self.active_port_senders:
+                samples = sender.latency_samples
+                total_latency += sum(samples)
+                latency_count += len(samples)
+            avg_latency = total_latency / latency_count / 1e6 if latency_count > 0 else 0
             
             # 队列状态
-            queue_size = self.midi_event_queue.qsize()
-            queue_percent = (queue_size / self.midi_event_queue.maxsize) * 100
+            queue_size = len(self.note_info_queue)
+            queue_capacity = self.note_info_queue.maxlen
+            queue_percent = queue_size * 100 // queue_capacity
             
             # 活跃端口数
-            active_ports = len([port for port in self.output_ports if port is not None])
+            active_ports = self.active_port_count
             
             # 更新性能标签
-            self.update_performance.emit('message_count', float(self.message_count))
-            self.update_performance.emit('throughput', throughput)
-            self.update_performance.emit('latency', avg_latency)
-            self.update_performance.emit('active_count', float(len(self.active_notes)))
+            set_text_if_changed(self.msg_count_label, f"消息计数: {self.message_count}")
+            set_text_if_changed(self.throughput_label, f"吞吐量: {throughput:.1f} msg/s")
+            set_text_if_changed(self.latency_label, f"平均延迟: {avg_latency:.2f} ms")
+            set_text_if_changed(self.active_count_label, f"活跃音符: {len(self.active_notes)}")
             
             # 更新队列状态标签
-            self.queue_label.setText(f"队列: {queue_size}/{self.midi_event_queue.maxsize} ({queue_percent:.0f}%)")
+            set_text_if_changed(self.queue_label, f"队列: {queue_size}/{queue_capacity} ({queue_percent}%)")
             
             # 更新端口计数标签
-            self.port_label.setText(f"活跃端口: {active_ports}")
+            set_text_if_changed(self.port_label, f"活跃端口: {active_ports}")
             
             # 更新统计数据
             self.last_message_count = self.message_count
@@ -1385,12 +1672,12 @@ class MIDIVirtualPlayer(QMainWindow):
 
     def update_progress_display(self):
         """独立的进度条更新，仅显示，不可交互"""
-        if not self.is_playing or self.total_file_duration == 0:
+        if not self.is_playing or self.is_paused or self.total_file_duration == 0:
             return
             
         # 计算当前播放时间
         if self.play_start_time:
-            self.current_play_time = time.time() - self.play_start_time
+            self.current_play_time = (time.perf_counter_ns() - self.play_start_time) / 1e9
             
         # 限制最大进度为100%
         if self.current_play_time > self.total_file_duration:
@@ -1405,15 +1692,20 @@ class MIDIVirtualPlayer(QMainWindow):
         
         # 直接更新UI
         self.progress_bar.setValue(int(progress))
-        self.progress_label.setText(f"{current_str} / {total_str}")
+        set_text_if_changed(self.progress_label, f"{current_str} / {total_str}")
 
     def toggle_floating_harmony_window(self):
         """切换浮动复音窗口"""
-        if self.floating_harmony_window is None or not self.floating_harmony_window.isVisible():
-            # 创建新的浮动窗口
-            self.floating_harmony_window = FloatingHarmonyWindow(self)
-            self.floating_harmony_window.closed.connect(self.on_floating_window_closed)
-            self.floating_harmony_window.show()
+        window = self.floating_harmony_window
+        if window is None or not window.isVisible():
+            if window is None:
+                # 首次打开时才创建浮动窗口，之后关闭只是隐藏，再次打开时复用
+                window = self.floating_harmony_window = FloatingHarmonyWindow(self)
+                window.closed.connect(self.on_floating_window_closed)
+            else:
+                # 清掉上次关闭前的旧数据，等待下一帧快照
+                window.clear_table()
+            window.show()
             
             # 隐藏主窗口中的表格
             self.harmony_table.setVisible(False)
@@ -1423,12 +1715,10 @@ class MIDIVirtualPlayer(QMainWindow):
             self.float_btn.setToolTip("关闭浮动窗口")
         else:
             # 关闭浮动窗口
-            self.floating_harmony_window.close()
+            window.close()
 
     def on_floating_window_closed(self):
         """浮动窗口关闭事件"""
-        self.floating_harmony_window = None
-        
         # 显示主窗口中的表格
         self.harmony_table.setVisible(True)
         
@@ -1436,29 +1726,52 @@ class MIDIVirtualPlayer(QMainWindow):
         self.float_btn.setIcon(QIcon.fromTheme("window-new"))
         self.float_btn.setToolTip("浮动窗口")
 
+    def is_window_shown(self):
+        """主窗口是否可见且未最小化"""
+        return self.isVisible() and not self.isMinimized()
+
     def process_ui_queue(self):
-        try:
-            while not self.ui_queue.empty():
-                pass
-        except:
-            pass
+        """取走音符线程的最新快照，每类更新每帧最多发送一次"""
+        # 窗口不可见时保留快照，恢复显示后再刷新
+        shown = self.is_window_shown()
+        floating = self.floating_harmony_window is not None and self.floating_harmony_window.isVisible()
+        if not shown and not floating:
+            return
+            
+        harmony = self.pending_harmony
+        if harmony is not None:
+            self.pending_harmony = None
+            if harmony:
+                self.update_harmony_table.emit(harmony)
+            else:
+                self.clear_harmony_table.emit()
+                
+        if not shown:
+            return
+            
+        theory = self.pending_theory
+        if theory is not None:
+            self.pending_theory = None
+            self.update_theory_text.emit(theory)
+            
+        history = self.pending_history
+        if history is not None:
+            self.pending_history = None
+            self.update_history_list.emit(*history)
 
-    @pyqtSlot(str, QColor)
-    def on_update_status(self, text, color):
+    @pyqtSlot(str, int)
+    def on_update_status(self, text, rgb):
         self.status_label.setText(text)
-        self.status_label.setStyleSheet(f"font-size: 11pt; font-weight: bold; color: {color.name()};")
+        # 颜色不变时不重新设置样式表，避免重复解析
+        style = STATUS_STYLE.format(rgb)
+        if style != self.status_label.styleSheet():
+            self.status_label.setStyleSheet(style)
 
     @pyqtSlot(list)
     def on_update_harmony_table(self, data):
         # 更新主窗口表格
         if self.harmony_table.isVisible():
-            self.harmony_table.setRowCount(0)
-            for row_idx, row_data in enumerate(data):
-                self.harmony_table.insertRow(row_idx)
-                for col_idx, (key, value) in enumerate(row_data.items()):
-                    item = QTableWidgetItem(value)
-                    item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-                    self.harmony_table.setItem(row_idx, col_idx, item)
+            fill_table_rows(self.harmony_table, data)
 
     @pyqtSlot()
     def on_clear_harmony_table(self):
@@ -1469,10 +1782,32 @@ class MIDIVirtualPlayer(QMainWindow):
     def on_update_theory_text(self, text):
         self.theory_text.setText(text)
 
-    @pyqtSlot(list)
-    def on_update_history_list(self, items):
-        self.history_list.clear()
-        self.history_list.addItems(items)
+    @pyqtSlot(int, list)
+    def on_update_history_list(self, total, items):
+        history_list = self.history_list
+        added = total - self.history_shown_total
+        self.history_shown_total = total
+        
+        history_list.setUpdatesEnabled(False)
+        history_list.blockSignals(True)
+        if added < 0 or added >= len(items):
+            # 重新开始或新增超过整页时整体重建
+            history_list.clear()
+            history_list.addItems(items)
+        else:
+            # 新记录插入顶部，超出部分从底部移除，其余行只更新变化的文本（如补上的时长）
+            if added:
+                history_list.insertItems(0, items[:added])
+            while history_list.count() > len(items):
+                history_list.takeItem(history_list.count() - 1)
+            if history_list.count() < len(items):
+                history_list.addItems(items[history_list.count():])
+            for row in range(added, len(items)):
+                item = history_list.item(row)
+                if item.text() != items[row]:
+                    item.setText(items[row])
+        history_list.blockSignals(False)
+        history_list.setUpdatesEnabled(True)
 
     @pyqtSlot(int, str)
     def on_update_progress(self, progress, text):
@@ -1480,30 +1815,25 @@ class MIDIVirtualPlayer(QMainWindow):
         self.progress_bar.setValue(progress)
         self.progress_label.setText(text)
 
-    @pyqtSlot(str, float)
-    def on_update_performance(self, type_name, value):
-        if type_name == 'message_count':
-            self.msg_count_label.setText(f"消息计数: {int(value)}")
-        elif type_name == 'throughput':
-            self.throughput_label.setText(f"吞吐量: {value:.1f} msg/s")
-        elif type_name == 'latency':
-            self.latency_label.setText(f"平均延迟: {value:.2f} ms")
-        elif type_name == 'active_count':
-            self.active_count_label.setText(f"活跃音符: {int(value)}")
-
-    @pyqtSlot(str, str)
-    def on_update_log(self, level, message):
-        color_map = {
-            'DEBUG': '#808080',
-            'INFO': '#000000',
-            'WARN': '#FF8C00',
-            'ERROR': '#FF0000',
-            'SUCCESS': '#008000'
-        }
-        
-        color = color_map.get(level, '#000000')
-        self.log_text.setTextColor(QColor(color))
-        self.log_text.append(message)
+    def flush_log_buffer(self):
+        """把缓冲的日志一次性写入日志框，整批只触发一次布局"""
+        log_buffer = self.log_buffer
+        if not log_buffer:
+            return
+            
+        document = self.log_text.document()
+        cursor = QTextCursor(document)
+        cursor.movePosition(QTextCursor.MoveOperation.End)
+        cursor.beginEditBlock()
+        first_line = document.isEmpty()
+        default_format = self.log_formats['INFO']
+        while log_buffer:
+            level, message = log_buffer.popleft()
+            if not first_line:
+                cursor.insertBlock()
+            first_line = False
+            cursor.insertText(message, self.log_formats.get(level, default_format))
+        cursor.endEditBlock()
         self.log_text.moveCursor(QTextCursor.MoveOperation.End)
 
     def closeEvent(self, event):
@@ -1515,23 +1845,30 @@ class MIDIVirtualPlayer(QMainWindow):
         # 停止定时器
         self.ui_timer.stop()
         self.perf_timer.stop()
-        self.progress_timer.stop()
+        self.log_timer.stop()
         
         # 关闭浮动窗口
         if self.floating_harmony_window:
             self.floating_harmony_window.close()
             
-        # 等待线程结束
-        for name, thread in self.threads.items():
-            if thread.is_alive():
-                thread.join(timeout=0.5)
+        # 所有线程已收到退出通知，共用同一个截止时刻等待，总耗时不超过0.5秒
+        senders = [sender for sender in self.port_senders if sender]
+        for sender in senders:
+            sender.stop()
+        threads = list(self.threads.values()) + [sender.thread for sender in senders]
+        deadline = time.monotonic() + 0.5
+        for thread in threads:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            thread.join(timeout=remaining)
                 
         # 关闭所有端口
         for i, port in enumerate(self.output_ports):
             if port:
                 try:
                     port.close()
-                    self.log_message(f"已关闭端口{i + 1}: {port.name}", "INFO")
+                    self.log_message("已关闭端口%d: %s", "INFO", i + 1, port.name)
                 except:
                     pass
             